@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import time
+
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+
+
+SECTION = """## Section {n}
+
+This is a paragraph with **bold**, _italic_ and `code` that goes on
+for a couple of lines to look like real prose.
+
+- first item
+- second item with a [link](/blog/tom)
+
+1. one
+2. two
+
+> a quote
+> over two lines
+
+```
+def example():
+
+    return {n}
+```
+
+"""
+
+def synthetic_document(target_bytes):
+    parts = ["# Benchmark document\n\n"]
+    size = len(parts[0])
+    n = 0
+    while size < target_bytes:
+        section = SECTION.format(n=n)
+        parts.append(section)
+        size += len(section)
+        n += 1
+    return "".join(parts)
+
+def timed(func, arg):
+    start = time.perf_counter()
+    result = func(arg)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the block parser on large synthetic documents.")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    print(f"{'MB':>6} {'blocks':>8} {'split s':>8} {'MB/s':>8} {'to html s':>10} {'MB/s':>8}")
+    for size_mb in args.sizes_mb:
+        markdown = synthetic_document(int(size_mb * 1024 * 1024))
+        mb = len(markdown) / (1024 * 1024)
+        blocks, split_seconds = timed(markdown_to_blocks, markdown)
+        _, html_seconds = timed(markdown_to_html_node, markdown)
+        print(f"{mb:>6.1f} {len(blocks):>8} {split_seconds:>8.2f} {mb / split_seconds:>8.1f} {html_seconds:>10.2f} {mb / html_seconds:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import random
+import re
+import timeit
+
+from block_markdown import (
+    BlockType, CODE_REGEX_PATTERN, ORDERED_LIST_REGEX_PATTERN, UNORDERED_LIST_REGEX_PATTERN, block_to_block_type,
+)
+
+
+# The previous classifier: an if/elif chain passing pattern strings to re.match,
+# with the heading and quote patterns the dispatch table replaced.
+HEADING_REGEX_PATTERN = r"^(#{1,6} ).*"
+QUOTE_REGEX_PATTERN = r"^>.*(\n>.*)*$"
+
+def regex_block_to_block_type(block):
+    if re.match(HEADING_REGEX_PATTERN, block):
+        return BlockType.HEADING
+    elif re.match(CODE_REGEX_PATTERN, block, re.DOTALL):
+        return BlockType.CODE
+    elif re.match(QUOTE_REGEX_PATTERN, block, re.DOTALL):
+        return BlockType.QUOTE
+    elif all(re.match(UNORDERED_LIST_REGEX_PATTERN, line) for line in block.split("\n")):
+        return BlockType.UNORDERED_LIST
+    elif _regex_is_ordered_list(block):
+        return BlockType.ORDERED_LIST
+    else:
+        return BlockType.PARAGRAPH
+
+def _regex_is_ordered_list(block):
+    for expected_number, line in enumerate(block.split("\n"), 1):
+        match = re.match(ORDERED_LIST_REGEX_PATTERN, line)
+        if not match or int(match.group(1)) != expected_number:
+            return False
+    return True
+
+SAMPLES = {
+    BlockType.PARAGRAPH: "This is a paragraph with **bold** and _italic_ text\nthat runs over two lines.",
+    BlockType.HEADING: "## A section heading",
+    BlockType.CODE: "```\ndef example():\n\n    return 1\n```",
+    BlockType.QUOTE: "> a quote\n> over two lines\n> and a third",
+    BlockType.UNORDERED_LIST: "- first item\n- second item\n- third item",
+    BlockType.ORDERED_LIST: "1. one\n2. two\n3. three",
+}
+
+def mixed_blocks(count):
+    # weighted like prose-heavy pages: mostly paragraphs, some of everything else
+    rng = random.Random(count)
+    weights = [60, 10, 5, 5, 10, 10]
+    return rng.choices(list(SAMPLES.values()), weights, k=count)
+
+def best_per_call(func, blocks, repeat, number):
+    seconds = min(timeit.repeat(lambda: [func(block) for block in blocks], repeat=repeat, number=number))
+    return seconds / (number * len(blocks))
+
+def main():
+    parser = argparse.ArgumentParser(description="Block classification: first-character dispatch vs the regex chain.")
+    parser.add_argument("--number", type=int, default=20000, help="classifications per measurement (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements, the fastest is kept (default: 5)")
+    args = parser.parse_args()
+
+    print(f"{'block type':<16} {'regex ns':>10} {'dispatch ns':>12} {'speedup':>8}")
+    cases = [(block_type.value, [block]) for block_type, block in SAMPLES.items()]
+    cases.append(("mixed", mixed_blocks(1000)))
+    for name, blocks in cases:
+        for block in blocks:
+            assert block_to_block_type(block) == regex_block_to_block_type(block), block
+        number = max(1, args.number // len(blocks))
+        old = best_per_call(regex_block_to_block_type, blocks, args.repeat, number)
+        new = best_per_call(block_to_block_type, blocks, args.repeat, number)
+        print(f"{name:<16} {old * 1e9:>10.0f} {new * 1e9:>12.0f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
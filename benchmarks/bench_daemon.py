@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from corpus import write_site
+from daemon import send_request
+
+
+MAIN = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'main.py'))
+TEMPLATE_FILE = os.path.join(os.path.dirname(__file__), '..', 'template.html')
+
+def edit_page(path, n):
+    # a real edit, so size and mtime both change
+    with open(path, 'a') as file:
+        file.write(f"\n\nEdit {n}.\n")
+
+def cold_rebuilds(site, page, repeat, pause):
+    # One `--incremental` process per edit: interpreter start, imports, loading
+    # the manifest and walking content/ every time.
+    times = []
+    for n in range(repeat):
+        time.sleep(pause)
+        edit_page(page, n)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN, "local", "/", "--incremental"], cwd=site, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def warm_rebuilds(site, page, repeat, with_paths, pause):
+    socket_path = os.path.join(site, "build.sock")
+    server = subprocess.Popen([sys.executable, MAIN, "serve", "local", "/", "--socket", socket_path], cwd=site, stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 600
+        while not os.path.exists(socket_path):
+            if server.poll() is not None or time.time() > deadline:
+                raise Exception("The build server didn't start")
+            time.sleep(0.05)
+        times = []
+        for n in range(repeat):
+            # the server saves its state after answering; edits come in slower than that
+            time.sleep(pause)
+            edit_page(page, n)
+            request = {"command": "build", "paths": [os.path.relpath(page, site)]} if with_paths else {"command": "build"}
+            start = time.perf_counter()
+            response = send_request(socket_path, request)
+            times.append((time.perf_counter() - start) * 1000)
+            if not response["ok"] or not response["changed"]:
+                raise Exception(f"Unexpected response: {response}")
+        send_request(socket_path, {"command": "shutdown"})
+        server.wait(30)
+        return times
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of rebuilding one edited page: a fresh --incremental process against a warm build server.")
+    parser.add_argument("--pages", type=int, default=2000, help="pages in the generated site (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=10, help="edits measured per mode (default: 10)")
+    parser.add_argument("--pause", type=float, default=0.2, help="seconds between edits (default: 0.2)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as site:
+        write_site(os.path.join(site, "content"), args.pages)
+        shutil.copy(TEMPLATE_FILE, os.path.join(site, "template.html"))
+        os.makedirs(os.path.join(site, "static"))
+        page = os.path.join(site, "content", "section0", "part0", "page0.md")
+        subprocess.run([sys.executable, MAIN, "local", "/", "--incremental"], cwd=site, check=True, stdout=subprocess.DEVNULL)
+
+        results = [
+            ("cold process (--incremental)", cold_rebuilds(site, page, args.repeat, args.pause)),
+            ("build server, walk sources", warm_rebuilds(site, page, args.repeat, False, args.pause)),
+            ("build server, paths given", warm_rebuilds(site, page, args.repeat, True, args.pause)),
+        ]
+
+    print(f"One edited page in a {args.pages}-page site, {args.repeat} edits each:")
+    for name, times in results:
+        print(f"  {name:30} median {statistics.median(times):9.1f} ms   min {min(times):9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import re
+import timeit
+
+from inline_markdown import text_to_textnodes, split_nodes_delimiter
+from textnode import TextNode, TextType
+
+
+SENTENCE = (
+    "This is **bold text** with an _italic_ word, a `code span`, "
+    "an ![image](/images/tolkien.png) and a [link](/blog/glorfindel). "
+)
+
+def multipass_text_to_textnodes(text):
+    # The five-pass pipeline text_to_textnodes used before the single-pass scanner.
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = _split_nodes_by_pattern(nodes, extract_markdown_images, "!", TextType.IMAGE)
+    nodes = _split_nodes_by_pattern(nodes, extract_markdown_links, "", TextType.LINK)
+    return nodes
+
+# The image and link splitting of that pipeline, as it was: findall, then
+# str.split on each rebuilt "[text](url)" in turn.
+def _split_nodes_by_pattern(old_nodes, extract_func, prefix, node_type):
+    new_nodes = []
+
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+
+        current_text = node.text
+        extracted_items = extract_func(current_text)
+
+        if len(extracted_items) == 0:
+            new_nodes.append(node)
+            continue
+
+        for item_text, url in extracted_items:
+            pattern = f"{prefix}[{item_text}]({url})"
+            split_nodes = current_text.split(pattern, 1)
+
+            if split_nodes[0]:
+                new_nodes.append(TextNode(split_nodes[0], TextType.TEXT))
+
+            new_nodes.append(TextNode(item_text, node_type, url))
+
+            if len(split_nodes) > 1:
+                current_text = split_nodes[1]
+            else:
+                current_text = ""
+
+        if current_text:
+            new_nodes.append(TextNode(current_text, TextType.TEXT))
+
+    return new_nodes
+
+def extract_markdown_images(text):
+    regex_pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
+    matches = re.findall(regex_pattern, text)
+    return matches
+
+def extract_markdown_links(text):
+    regex_pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
+    matches = re.findall(regex_pattern, text)
+    return matches
+
+def long_paragraph(sentences):
+    return SENTENCE * sentences
+
+def bench(func, text, repeat):
+    return min(timeit.repeat(lambda: func(text), number=1, repeat=repeat))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the single-pass inline scanner with the multi-pass pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000], help="paragraph lengths in sentences")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sentences':>10} {'KB':>8} {'multi-pass ms':>14} {'single-pass ms':>15} {'speedup':>8}")
+    for sentences in args.sizes:
+        text = long_paragraph(sentences)
+        assert text_to_textnodes(text) == multipass_text_to_textnodes(text)
+        old = bench(multipass_text_to_textnodes, text, args.repeat)
+        new = bench(text_to_textnodes, text, args.repeat)
+        print(f"{sentences:>10} {len(text) / 1024:>8.1f} {old * 1000:>14.2f} {new * 1000:>15.2f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from block_markdown import markdown_to_html_node
+from bench_blocks import synthetic_document
+
+
+def count_nodes(node):
+    total = 1
+    for child in node.children or []:
+        total += count_nodes(child)
+    return total
+
+def measure(path):
+    # Runs in a fresh interpreter so ru_maxrss reflects this page alone.
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open(path, 'r') as file:
+        markdown = file.read()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    node = markdown_to_html_node(markdown)
+    with open(os.devnull, 'w') as devnull:
+        node.write_html(devnull)
+    seconds = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "page": path,
+        "bytes": len(markdown.encode()),
+        "nodes": count_nodes(node),
+        "seconds": round(seconds, 4),
+        "traced_peak_mb": round(traced_peak / (1024 * 1024), 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024, 2),
+    }
+
+def largest_pages(content_dir, count):
+    pages = []
+    for root, _, files in os.walk(content_dir):
+        for name in files:
+            if name.endswith(".md"):
+                path = os.path.join(root, name)
+                pages.append((os.path.getsize(path), path))
+    return [path for _, path in sorted(pages, reverse=True)[:count]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory while rendering the largest pages.")
+    parser.add_argument("--content", default="content", help="content directory to pick pages from")
+    parser.add_argument("--count", type=int, default=5, help="number of largest pages to measure")
+    parser.add_argument("--synthetic-mb", type=float, nargs="*", default=[5], help="also measure synthetic pages of these sizes")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    pages = largest_pages(args.content, args.count)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.synthetic_mb:
+            path = os.path.join(tmp, f"synthetic-{size_mb}mb.md")
+            with open(path, 'w') as file:
+                file.write(synthetic_document(int(size_mb * 1024 * 1024)))
+            pages.append(path)
+
+        print(f"{'KB':>8} {'nodes':>9} {'s':>7} {'traced MB':>10} {'peak RSS MB':>12} {'RSS growth MB':>14}  page")
+        for page in pages:
+            output = subprocess.run([sys.executable, __file__, "--child", page], capture_output=True, text=True, check=True).stdout
+            result = json.loads(output)
+            print(f"{result['bytes'] / 1024:>8.1f} {result['nodes']:>9} {result['seconds']:>7.2f} {result['traced_peak_mb']:>10.2f} {result['peak_rss_mb']:>12.2f} {result['rss_growth_mb']:>14.2f}  {os.path.relpath(page, tmp) if page.startswith(tmp) else page}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+
+from contextlib import redirect_stdout
+
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+from corpus import CORPORA, write_site
+
+
+RESULTS_VERSION = 1
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+TEMPLATE_FILE = os.path.join(os.path.dirname(__file__), '..', 'template.html')
+MB = 1024 * 1024
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+def measure_document(name, size_mb, repeat):
+    # Runs in a fresh interpreter, so peak RSS belongs to this corpus alone.
+    markdown = CORPORA[name](int(size_mb * MB))
+    mb = len(markdown.encode()) / MB
+    baseline_rss = peak_rss_mb()
+
+    _, split_seconds = best_of(repeat, lambda: markdown_to_blocks(markdown))
+    node, parse_seconds = best_of(repeat, lambda: markdown_to_html_node(markdown))
+    with open(os.devnull, 'w') as devnull:
+        _, serialize_seconds = best_of(repeat, lambda: node.write_html(devnull))
+
+    return {
+        "mb": round(mb, 3),
+        "split_mb_s": round(mb / split_seconds, 3),
+        "parse_mb_s": round(mb / parse_seconds, 3),
+        "serialize_mb_s": round(mb / serialize_seconds, 3),
+        "total_mb_s": round(mb / (parse_seconds + serialize_seconds), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 2),
+        "rss_growth_mb": round(peak_rss_mb() - baseline_rss, 2),
+    }
+
+def measure_site(pages, jobs):
+    # Renders a generated site end to end through main.generate_pages.
+    from main import discover_files, generate_pages
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        total_bytes = write_site(content_dir, pages)
+        page_list = list(discover_files(content_dir, os.path.join(tmp, "public"), ".html"))
+        baseline_rss = peak_rss_mb()
+
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            failed = generate_pages(page_list, TEMPLATE_FILE, "/", jobs)
+        seconds = time.perf_counter() - start
+
+    if failed:
+        raise Exception(f"{len(failed)} generated page(s) failed to render")
+    return {
+        "pages": pages,
+        "jobs": jobs,
+        "mb": round(total_bytes / MB, 3),
+        "seconds": round(seconds, 3),
+        "pages_s": round(pages / seconds, 1),
+        "mb_s": round(total_bytes / MB / seconds, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 2),
+        "rss_growth_mb": round(peak_rss_mb() - baseline_rss, 2),
+    }
+
+def run_child(*args):
+    output = subprocess.run([sys.executable, __file__, "--child", *args], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results, baseline):
+    # Throughput ratios against an earlier results file; above 1.0 is faster.
+    lines = [f"Compared with {baseline['commit']}:"]
+    for name, metrics in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratios = [
+            f"{key} {value / before[key]:.2f}x"
+            for key, value in metrics.items()
+            if (key.endswith("mb_s") or key == "pages_s") and before.get(key)
+        ]
+        lines.append(f"  {name:<20} {', '.join(ratios)}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and peak memory of the markdown pipeline on synthetic corpora.")
+    parser.add_argument("--corpora", nargs="+", choices=list(CORPORA), default=list(CORPORA))
+    parser.add_argument("--size-mb", type=float, default=2, help="size of each synthetic document (default: 2)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is kept (default: 3)")
+    parser.add_argument("--site-pages", type=int, default=10000, help="pages in the generated site, 0 skips it (default: 10000)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the site build (default: 1)")
+    parser.add_argument("--output", help=f"results file (default: {os.path.relpath(DEFAULT_RESULTS_DIR)}/<commit>.json)")
+    parser.add_argument("--compare", metavar="FILE", help="print throughput ratios against an earlier results file")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, *rest = args.child
+        if kind == "document":
+            print(json.dumps(measure_document(rest[0], float(rest[1]), int(rest[2]))))
+        else:
+            print(json.dumps(measure_site(int(rest[0]), int(rest[1]))))
+        return
+
+    commit = git_commit()
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "size_mb": args.size_mb,
+        "results": {},
+    }
+
+    print(f"{'corpus':<20} {'MB':>6} {'split MB/s':>11} {'parse MB/s':>11} {'html MB/s':>10} {'total MB/s':>11} {'RSS growth MB':>14}")
+    for name in args.corpora:
+        result = results["results"][name] = run_child("document", name, str(args.size_mb), str(args.repeat))
+        print(f"{name:<20} {result['mb']:>6.1f} {result['split_mb_s']:>11.2f} {result['parse_mb_s']:>11.2f} "
+              f"{result['serialize_mb_s']:>10.2f} {result['total_mb_s']:>11.2f} {result['rss_growth_mb']:>14.1f}")
+
+    if args.site_pages:
+        result = results["results"]["site"] = run_child("site", str(args.site_pages), str(args.jobs))
+        print(f"site: {result['pages']} pages ({result['mb']:.1f} MB) in {result['seconds']:.2f}s, "
+              f"{result['pages_s']:.0f} pages/s, {result['mb_s']:.2f} MB/s, RSS growth {result['rss_growth_mb']:.1f} MB")
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}.")
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            print(compare(results, json.load(file)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import random
+
+from bench_blocks import synthetic_document
+
+
+# Synthetic markdown corpora, each stressing one part of the pipeline. Every
+# generator takes a target size in bytes and is deterministic, so results
+# from different commits are measured on identical input.
+
+WORDS = (
+    "ring shire hobbit wizard mountain river forest elf dwarf king road "
+    "shadow light tower sword song tale journey fellowship council gate"
+).split()
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def _inline_sentence(rng):
+    # one of every inline construct text_to_textnodes handles
+    return (
+        f"The {_words(rng, 3)} **{_words(rng, 2)}** and _{_words(rng, 2)}_ with `{rng.choice(WORDS)}()`, "
+        f"a [{_words(rng, 2)}](/blog/{rng.choice(WORDS)}) and ![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png). "
+    )
+
+def _fill(target_bytes, make_block, separator="\n\n"):
+    rng = random.Random(target_bytes)
+    parts = ["# Benchmark corpus"]
+    size = len(parts[0])
+    while size < target_bytes:
+        block = make_block(rng, len(parts))
+        parts.append(block)
+        size += len(block) + len(separator)
+    return separator.join(parts) + "\n"
+
+def inline_paragraphs(target_bytes):
+    # long paragraphs, every line dense with inline markup
+    return _fill(target_bytes, lambda rng, n: "\n".join("".join(_inline_sentence(rng) for _ in range(4)) for _ in range(5)))
+
+def huge_lists(target_bytes):
+    # a few lists with thousands of items each, alternating ordered and unordered
+    def make_list(rng, n):
+        if n % 2:
+            return "\n".join(f"- {_words(rng, 4)} **{rng.choice(WORDS)}** [{rng.choice(WORDS)}](/blog/{n})" for _ in range(5000))
+        return "\n".join(f"{i}. {_words(rng, 5)} _{rng.choice(WORDS)}_" for i in range(1, 5001))
+    return _fill(target_bytes, make_list)
+
+def deep_quotes(target_bytes):
+    # long blockquotes whose lines carry nested '>' markers
+    def make_quote(rng, n):
+        return "\n".join(f"{'> ' * (1 + i % 8)}{_words(rng, 8)} _{rng.choice(WORDS)}_" for i in range(200))
+    return _fill(target_bytes, make_quote)
+
+def code_blocks(target_bytes):
+    # many fenced code blocks, some with blank lines inside, between short paragraphs
+    def make_code(rng, n):
+        body = "\n".join(f"    {rng.choice(WORDS)} = {rng.choice(WORDS)}({n}, {i})" if i % 7 else "" for i in range(1, 30))
+        return f"Example {n} uses `{rng.choice(WORDS)}`:\n\n```\ndef example_{n}():\n{body}\n```"
+    return _fill(target_bytes, make_code)
+
+def mixed(target_bytes):
+    return synthetic_document(target_bytes)
+
+CORPORA = {
+    "inline_paragraphs": inline_paragraphs,
+    "huge_lists": huge_lists,
+    "deep_quotes": deep_quotes,
+    "code_blocks": code_blocks,
+    "mixed": mixed,
+}
+
+def write_site(content_dir, pages, page_bytes=4096):
+    # A site of `pages` small pages spread over nested sections, written to
+    # content_dir. Returns the total number of markdown bytes written.
+    rng = random.Random(pages)
+    total = 0
+    for i in range(pages):
+        section = os.path.join(content_dir, f"section{i % 20}", f"part{i % 7}")
+        os.makedirs(section, exist_ok=True)
+        body = mixed(page_bytes) if i % 10 == 0 else inline_paragraphs(page_bytes // 2)
+        # swap the corpus heading for a per-page title
+        body = body.split("\n\n", 1)[1]
+        markdown = f"# Page {i}: {_words(rng, 3)}\n\n{body}"
+        with open(os.path.join(section, f"page{i}.md"), 'w') as file:
+            file.write(markdown)
+        total += len(markdown.encode())
+    return total
@@ -1,2 +1 @@
-python3 src/main.py local
-cd public && python3 -m http.server 8888
\ No newline at end of file
+python3 src/main.py watch local --port 8888
\ No newline at end of file
@@ -0,0 +1,178 @@
+import os, errno, time
+import shutil
+
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+
+
+FICLONE = 0x40049409 # linux/fs.h, clones a file's extents on btrfs/xfs
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+def walk_files(source_dir, dest_dir):
+    # Yields (source path, destination path, source stat) for every file under source_dir.
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            dest_path = os.path.join(dest_dir, entry.name)
+            if entry.is_dir():
+                yield from walk_files(entry.path, dest_path)
+            elif entry.is_file():
+                yield entry.path, dest_path, entry.stat()
+
+def is_unchanged(source_path, source_stat, dest_path, compare="mtime"):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+    if compare == "hash":
+        return hash_file(source_path) == hash_file(dest_path)
+    return dest_stat.st_mtime_ns == source_stat.st_mtime_ns
+
+def copy_file(source_path, dest_path, hardlink=False):
+    # Copies one file using the cheapest mechanism available, falling back
+    # step by step: hardlink (if allowed), reflink, copy_file_range, byte copy.
+    # The destination is unlinked first so a previous hardlink is never written
+    # through. Returns the name of the mechanism that worked.
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+    if hardlink:
+        try:
+            os.link(source_path, dest_path)
+            return "hardlink"
+        except OSError:
+            pass
+
+    with open(source_path, 'rb') as source, open(dest_path, 'wb') as dest:
+        method = _copy_fast(source, dest)
+        if method is None:
+            shutil.copyfileobj(source, dest)
+            method = "copy"
+
+    shutil.copystat(source_path, dest_path)
+    return method
+
+def _copy_fast(source, dest):
+    try:
+        import fcntl
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+        return "reflink"
+    except (ImportError, OSError):
+        pass
+
+    if not hasattr(os, "copy_file_range"):
+        return None
+    try:
+        while os.copy_file_range(source.fileno(), dest.fileno(), COPY_CHUNK_SIZE) > 0:
+            pass
+        return "copy_file_range"
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+            raise
+        # nothing usable was copied; rewind both sides for the byte copy
+        source.seek(0)
+        dest.seek(0)
+        dest.truncate()
+        return None
+
+class SyncStats():
+    def __init__(self):
+        self.copied = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.bytes_copied = 0
+        self.seconds = 0.0
+        self.methods = {}
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes_copied / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        methods = ", ".join(f"{name}: {count}" for name, count in sorted(self.methods.items()))
+        summary = f"{self.copied} copied, {self.unchanged} unchanged, {self.removed} removed"
+        if self.copied:
+            summary += f", {self.bytes_copied / 1e6:.1f} MB in {self.seconds:.2f}s ({self.bytes_per_second / 1e6:.1f} MB/s)"
+        return f"{summary} ({methods})" if methods else summary
+
+class SyncPlan():
+    # The result of walking source and destination: which files still need
+    # copying, plus the counts gathered while deciding that.
+    def __init__(self, copies, stats):
+        self.copies = copies # [(source path, destination path, size)]
+        self.stats = stats
+
+def plan_sync(source_dir, dest_dir, compare="mtime", keep=(), rename=None, sibling_suffixes=()):
+    # Walks source_dir, decides which files differ from dest_dir, and removes
+    # destination files that are neither in source_dir nor listed in keep
+    # (along with emptied directories). Nothing is copied yet. rename, if
+    # given, maps each destination path to the path actually written.
+    # Files named after an expected path plus one of sibling_suffixes (such as
+    # precompressed page.html.gz) are kept too.
+    stats = SyncStats()
+    copies = []
+    expected = {os.path.normpath(path) for path in keep}
+
+    if os.path.isdir(source_dir):
+        for source_path, dest_path, source_stat in walk_files(source_dir, dest_dir):
+            if rename is not None:
+                dest_path = rename(dest_path)
+            expected.add(os.path.normpath(dest_path))
+            if is_unchanged(source_path, source_stat, dest_path, compare):
+                stats.unchanged += 1
+            else:
+                copies.append((source_path, dest_path, source_stat.st_size))
+
+    if sibling_suffixes:
+        expected |= {path + suffix for path in expected for suffix in sibling_suffixes}
+    if os.path.isdir(dest_dir):
+        stats.removed = prune_directory(dest_dir, expected)
+    return SyncPlan(copies, stats)
+
+def copy_files(plan, hardlink=False, threads=1):
+    # Copies the planned files, fanned out over a bounded thread pool when
+    # threads > 1 (copies are I/O bound, so threads overlap their latency).
+    stats = plan.stats
+    start = time.perf_counter()
+
+    def copy_one(copy):
+        source_path, dest_path, size = copy
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        return copy_file(source_path, dest_path, hardlink), size
+
+    if threads > 1 and len(plan.copies) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(copy_one, plan.copies))
+    else:
+        results = [copy_one(copy) for copy in plan.copies]
+
+    for method, size in results:
+        stats.methods[method] = stats.methods.get(method, 0) + 1
+        stats.copied += 1
+        stats.bytes_copied += size
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+def sync_directory(source_dir, dest_dir, compare="mtime", hardlink=False, keep=(), threads=1):
+    # Makes dest_dir mirror source_dir without recopying unchanged files.
+    # Files are compared by size and mtime (kept in sync on copy), or by
+    # content hash with compare="hash".
+    return copy_files(plan_sync(source_dir, dest_dir, compare, keep), hardlink, threads)
+
+def prune_directory(directory, expected):
+    # Removes files under directory that are not in expected, bottom up, and
+    # any directories left empty. Returns the number of files removed.
+    removed = 0
+    with os.scandir(directory) as entries:
+        entries = list(entries)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            removed += prune_directory(entry.path, expected)
+            if not os.listdir(entry.path):
+                os.rmdir(entry.path)
+        elif os.path.normpath(entry.path) not in expected:
+            os.remove(entry.path)
+            removed += 1
+    return removed
@@ -0,0 +1,73 @@
+import hashlib
+
+from collections import OrderedDict
+from state import load_state, save_state
+
+
+BLOCK_CACHE_VERSION = 2
+DEFAULT_MAX_ENTRIES = 50000
+
+def block_key(block):
+    return hashlib.blake2b(block.encode(), digest_size=16).hexdigest()
+
+class BlockCache():
+    # Content-addressed LRU cache from a markdown block's hash to its rendered
+    # HTML fragment and link URLs, so blocks repeated across pages are parsed
+    # only once.
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._added = {}
+
+    @classmethod
+    def load(cls, path, max_entries=DEFAULT_MAX_ENTRIES):
+        cache = cls(max_entries)
+        for key, html in load_state(path, BLOCK_CACHE_VERSION).get("entries", []):
+            cache._store(key, html)
+        return cache
+
+    def save(self, path):
+        save_state(path, BLOCK_CACHE_VERSION, {"entries": list(self.entries.items())})
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, key, html):
+        self._store(key, html)
+        self._added[key] = html
+
+    def _store(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def take_changes(self):
+        # Hit/miss counts and entries added since the last call, so a worker
+        # process's cache activity can be merged into the parent's cache.
+        changes = {"hits": self.hits, "misses": self.misses, "entries": self._added}
+        self.hits = self.misses = 0
+        self._added = {}
+        return changes
+
+    def merge_changes(self, changes):
+        self.hits += changes["hits"]
+        self.misses += changes["misses"]
+        for key, html in changes["entries"].items():
+            self._store(key, html)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        return f"Block cache: {self.hits} hit(s), {self.misses} miss(es), {self.hit_rate:.1%} hit rate, {len(self.entries)} entries."
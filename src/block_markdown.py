@@ -1,16 +1,24 @@
-import textwrap, re
+import os, re
 
 from enum import Enum
-from htmlnode import ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from block_cache import block_key
 from textnode import TextNode, TextType
-from inline_markdown import text_to_textnodes
+from inline_markdown import add_collected_links, collect_links, text_to_textnodes
 
-HEADING_REGEX_PATTERN = r"^(#{1,6} ).*"
 CODE_REGEX_PATTERN = r'^```.*?\n(.*?)```\s*$'
-QUOTE_REGEX_PATTERN = r"^>.*(\n>.*)*$"
 UNORDERED_LIST_REGEX_PATTERN = r"^[\*\-\+]\s+"
 ORDERED_LIST_REGEX_PATTERN = r"^(\d+)\.\s+"
 WHITESPACE_COLLAPSE_PATTERN = r'\s+'
+INDENT_REGEX_PATTERN = r"^[ \t]*(?=[^ \t\n])"
+
+_indent_regex = re.compile(INDENT_REGEX_PATTERN, re.MULTILINE)
+_line_indent_regex = re.compile(INDENT_REGEX_PATTERN)
+_code_regex = re.compile(CODE_REGEX_PATTERN, re.DOTALL)
+_unordered_list_regex = re.compile(UNORDERED_LIST_REGEX_PATTERN)
+_ordered_list_regex = re.compile(ORDERED_LIST_REGEX_PATTERN)
+_whitespace_regex = re.compile(WHITESPACE_COLLAPSE_PATTERN)
+_title_regex = re.compile(r"^# (.*)", re.MULTILINE)
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -21,50 +29,184 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 def extract_title(markdown):
-    markdown = textwrap.dedent(markdown)
-    markdown = markdown.split("\n")
+    # The first '# ' line once the common indent is removed, found without
+    # dedenting or splitting the whole document.
+    indent = common_indent(markdown)
+    title_regex = re.compile(rf"^{re.escape(indent)}# (.*)", re.MULTILINE) if indent else _title_regex
+    match = title_regex.search(markdown)
+    if match is None:
+        raise Exception("No h1 header provided, cannot extract title")
+    return match.group(1).strip()
 
-    for node in markdown:
-        if node.startswith("# "):
-            return node[2:].strip()
+def find_title(lines, indent=""):
+    # extract_title for a stream of lines; stops reading at the title.
+    for line in lines:
+        if line.startswith(indent) and line[len(indent):].startswith("# "):
+            return line[len(indent) + 2:].strip()
     raise Exception("No h1 header provided, cannot extract title")
 
 def markdown_to_blocks(markdown):
-    markdown = textwrap.dedent(markdown)
-    markdown_nodes = markdown.split("\n\n")
+    return [block for _, block in iter_blocks(markdown.split("\n"), common_indent(markdown))]
+
+def common_indent(markdown):
+    # The whitespace prefix textwrap.dedent would remove. Stops scanning as soon
+    # as an unindented line is seen, which for most documents is the first one.
+    return _common_prefix(match.group() for match in _indent_regex.finditer(markdown))
+
+def common_indent_of_lines(lines):
+    # common_indent for a stream of lines, read only as far as needed.
+    matches = (_line_indent_regex.match(line) for line in lines)
+    return _common_prefix(match.group() for match in matches if match is not None)
+
+def _common_prefix(indents):
+    indent = None
+    for line_indent in indents:
+        if indent is None or not line_indent.startswith(indent):
+            indent = line_indent if indent is None else os.path.commonprefix([indent, line_indent])
+        if indent == "":
+            break
+    return indent or ""
+
+def iter_blocks(lines, indent="", fences=True):
+    # Line-oriented state machine yielding (BlockType, block) pairs. Blocks are
+    # separated by blank lines, except inside a ``` fence, which runs until its
+    # closing ``` line. Each block is classified while its lines are read.
+    cut = len(indent)
+    block = []
+    in_fence = False
+    is_unordered = is_ordered = True
+    expected_number = 1
+
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if cut and line.startswith(indent):
+            line = line[cut:]
+        blank = line.strip() == ""
 
-    filtered_list = []
-    for node in markdown_nodes:
-        if node == "":
+        if in_fence:
+            block.append("" if blank else line)
+            if line.rstrip().endswith("```"):
+                block[-1] = block[-1].rstrip()
+                yield BlockType.CODE, "\n".join(block)
+                block = []
+                in_fence = False
             continue
-        node = node.strip()
-        filtered_list.append(node)
-
-    return filtered_list
-
-def markdown_to_html_node(markdown):
-    markdown_blocks = markdown_to_blocks(markdown)
-    parent_node = ParentNode("div", [])
-
-    for block in markdown_blocks:
-        block_type = block_to_block_type(block)
-
-        if block_type == BlockType.HEADING:
-            parent_node.children.append(generate_heading_node(block))
-        elif block_type == BlockType.CODE:
-            parent_node.children.append(generate_code_node(block))
-        elif block_type == BlockType.QUOTE:
-            parent_node.children.append(generate_quote_node(block))
-        elif block_type == BlockType.UNORDERED_LIST:
-            parent_node.children.append(generate_unordered_list_node(block))
-        elif block_type == BlockType.ORDERED_LIST:
-            parent_node.children.append(generate_ordered_list_node(block))
+
+        if blank:
+            if block:
+                yield _finish_block(block, is_unordered, is_ordered, expected_number)
+                block = []
+                is_unordered = is_ordered = True
+                expected_number = 1
+            continue
+
+        if not block:
+            line = line.lstrip()
+            # a line that also closes the ``` (```npm install```) is inline code, not a fence
+            if fences and line.startswith("```") and not line.rstrip()[3:].endswith("```"):
+                block.append(line)
+                in_fence = True
+                continue
+
+        block.append(line)
+        if is_unordered:
+            is_unordered = _is_unordered_item(line)
+        if is_ordered:
+            if _ordered_item_number(line) == expected_number:
+                expected_number += 1
+            else:
+                is_ordered = False
+
+    if in_fence:
+        # unterminated fence: not a code block, parse its lines as ordinary blocks
+        yield from iter_blocks(block, "", fences=False)
+    elif block:
+        yield _finish_block(block, is_unordered, is_ordered, expected_number)
+
+def _finish_block(lines, is_unordered, is_ordered, expected_number):
+    last_line = lines[-1].rstrip()
+    if last_line != lines[-1]:
+        # the list checks saw the unstripped last line; re-check the stripped one
+        lines[-1] = last_line
+        is_unordered = is_unordered and _is_unordered_item(last_line)
+        is_ordered = is_ordered and _ordered_item_number(last_line) == expected_number - 1
+    block = "\n".join(lines)
+
+    if lines[0].startswith("```") and _code_regex.match(block):
+        # a code block whose opening line also ends in ```, e.g. ```a```\ncode\n```
+        return BlockType.CODE, block
+    if _is_heading(lines[0]):
+        return BlockType.HEADING, block
+    if block.startswith(">"):
+        return BlockType.QUOTE, block
+    if is_unordered:
+        return BlockType.UNORDERED_LIST, block
+    if is_ordered:
+        return BlockType.ORDERED_LIST, block
+    return BlockType.PARAGRAPH, block
+
+def _is_heading(line):
+    hashtags = len(line) - len(line.lstrip("#"))
+    return 1 <= hashtags <= 6 and line[hashtags:hashtags + 1] == " "
+
+def _is_unordered_item(line):
+    return len(line) > 1 and line[0] in "*-+" and line[1].isspace()
+
+def _ordered_item_number(line):
+    if not line[:1].isdigit():
+        return None
+    match = _ordered_list_regex.match(line)
+    return int(match.group(1)) if match else None
+
+def markdown_to_html_node(markdown, block_cache=None):
+    nodes = list(iter_block_nodes(markdown.split("\n"), common_indent(markdown), block_cache))
+    # a page can be all front matter; its body is then an empty <div>, as when streamed
+    return ParentNode("div", nodes) if nodes else LeafNode("div", "")
+
+class BlockStreamNode(HTMLNode):
+    # A <div> of the blocks read from `lines` (e.g. an open file), each one
+    # parsed and serialized before the next is read, so the node tree of a
+    # huge page never exists as a whole. The lines are consumed by writing.
+    __slots__ = ("lines", "indent", "block_cache")
+
+    def __init__(self, lines, indent="", block_cache=None):
+        super().__init__("div")
+        self.lines = lines
+        self.indent = indent
+        self.block_cache = block_cache
+
+    def emit_html(self, emit):
+        emit("<div>")
+        for node in iter_block_nodes(self.lines, self.indent, self.block_cache):
+            node.emit_html(emit)
+        emit("</div>")
+
+def iter_block_nodes(lines, indent="", block_cache=None):
+    for block_type, block in iter_blocks(lines, indent):
+        if block_cache is None:
+            yield block_to_html_node(block_type, block)
+            continue
+
+        # entries keep the block's link URLs next to its HTML, so the link
+        # checker still sees links of blocks that are not parsed again
+        key = block_key(block)
+        entry = block_cache.get(key)
+        if entry is None:
+            with collect_links() as links:
+                html = block_to_html_node(block_type, block).to_html()
+            block_cache.put(key, [html, links])
         else:
-            children = text_to_children(re.sub(WHITESPACE_COLLAPSE_PATTERN, ' ', block))
-            p_node = ParentNode("p", children)
-            parent_node.children.append(p_node)
-    
-    return parent_node
+            html, links = entry
+            add_collected_links(links)
+        yield LeafNode(None, html)
+
+def block_to_html_node(block_type, block):
+    return _node_generators[block_type](block)
+
+def generate_paragraph_node(block):
+    children = text_to_children(_whitespace_regex.sub(' ', block))
+    return ParentNode("p", children)
 
 def text_to_children(text):
     text_nodes = text_to_textnodes(text)
@@ -93,7 +235,7 @@ def generate_heading_node(block):
     return ParentNode(f"h{hashtags}", children, None)
 
 def generate_code_node(block):
-    code_content = re.sub(CODE_REGEX_PATTERN, r'\1', block, flags=re.DOTALL)
+    code_content = _code_regex.sub(r'\1', block)
     text_node = TextNode(code_content, TextType.TEXT)
     code_leaf_node = TextNode.text_node_to_html_node(text_node)
     code_node = ParentNode("code", [code_leaf_node])
@@ -124,7 +266,7 @@ def generate_unordered_list_node(block):
     for item in items:
         if not item.strip():
             continue
-        content = re.sub(UNORDERED_LIST_REGEX_PATTERN, "", item.strip())
+        content = _unordered_list_regex.sub("", item.strip())
         children = text_to_children(content)
         li_node = ParentNode("li", children, None)
         list_node.children.append(li_node)
@@ -139,42 +281,62 @@ def generate_ordered_list_node(block):
     for item in items:
         if not item.strip():
             continue
-        content = re.sub(ORDERED_LIST_REGEX_PATTERN, "", item.strip())
+        content = _ordered_list_regex.sub("", item.strip())
         children = text_to_children(content)
         li_node = ParentNode("li", children, None)
         list_node.children.append(li_node)
     
     return list_node
 
+_node_generators = {
+    BlockType.PARAGRAPH: generate_paragraph_node,
+    BlockType.HEADING: generate_heading_node,
+    BlockType.CODE: generate_code_node,
+    BlockType.QUOTE: generate_quote_node,
+    BlockType.UNORDERED_LIST: generate_unordered_list_node,
+    BlockType.ORDERED_LIST: generate_ordered_list_node,
+}
+
 def block_to_block_type(block):
-    if re.match(HEADING_REGEX_PATTERN, block):
-        return BlockType.HEADING
-    elif re.match(CODE_REGEX_PATTERN, block, re.DOTALL):
-        return BlockType.CODE
-    elif re.match(QUOTE_REGEX_PATTERN, block, re.DOTALL):
-        return BlockType.QUOTE
-    elif _is_unordered_list(block):
-        return BlockType.UNORDERED_LIST
-    elif _is_ordered_list(block):
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
+    # The first character rules out every type but one, so a block is typed
+    # by one dictionary lookup plus at most one check for that type.
+    classify = _block_classifiers.get(block[:1])
+    return classify(block) if classify is not None else BlockType.PARAGRAPH
+
+def _classify_heading(block):
+    return BlockType.HEADING if _is_heading(block) else BlockType.PARAGRAPH
+
+def _classify_code(block):
+    return BlockType.CODE if _code_regex.match(block) else BlockType.PARAGRAPH
+
+def _classify_quote(block):
+    # every line of a '>' block is part of the quote
+    return BlockType.QUOTE
+
+def _classify_unordered_list(block):
+    return BlockType.UNORDERED_LIST if _is_unordered_list(block) else BlockType.PARAGRAPH
+
+def _classify_ordered_list(block):
+    return BlockType.ORDERED_LIST if _is_ordered_list(block) else BlockType.PARAGRAPH
+
+_block_classifiers = {
+    "#": _classify_heading,
+    "`": _classify_code,
+    ">": _classify_quote,
+    **{char: _classify_unordered_list for char in "*-+"},
+    **{digit: _classify_ordered_list for digit in "0123456789"},
+}
 
 def _is_unordered_list(block):
     for line in block.split('\n'):
-        if not re.match(UNORDERED_LIST_REGEX_PATTERN, line):
+        if not _is_unordered_item(line):
             return False
     return True
 
 def _is_ordered_list(block):
     expected_number = 1
     for line in block.split('\n'):
-        match = re.match(ORDERED_LIST_REGEX_PATTERN, line)
-        if not match:
-            return False
-        
-        number = int(match.group(1))
-        if number != expected_number:
+        if _ordered_item_number(line) != expected_number:
             return False
         expected_number += 1
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,120 @@
+import os, gzip
+
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+from state import load_state, save_state
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".xml", ".svg", ".txt"}
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "br": ".br", "zstd": ".zst"}
+DEFAULT_MIN_SIZE = 1024
+COMPRESS_INDEX_VERSION = 1
+
+def available_formats():
+    formats = ["gzip"]
+    if brotli is not None:
+        formats.append("br")
+    if zstandard is not None:
+        formats.append("zstd")
+    return formats
+
+def compress_bytes(data, format):
+    if format == "gzip":
+        # mtime=0 keeps the output byte-identical between builds
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if format == "br":
+        return brotli.compress(data, quality=11)
+    if format == "zstd":
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    raise ValueError(f"unknown compression format '{format}'")
+
+def compressed_siblings(path, formats):
+    return [path + COMPRESSED_SUFFIXES[format] for format in formats]
+
+class CompressStats():
+    def __init__(self):
+        self.compressed = 0
+        self.unchanged = 0
+        self.too_small = 0
+        self.removed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def __repr__(self):
+        summary = f"{self.compressed} compressed, {self.unchanged} unchanged, {self.too_small} below the size threshold, {self.removed} stale removed"
+        if self.bytes_in:
+            summary += f", {self.bytes_in / 1e6:.1f} MB -> {self.bytes_out / 1e6:.1f} MB"
+        return summary
+
+def _compress_file(path, formats):
+    with open(path, 'rb') as file:
+        data = file.read()
+    written = 0
+    for format, sibling in zip(formats, compressed_siblings(path, formats)):
+        compressed = compress_bytes(data, format)
+        tmp_path = f"{sibling}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(compressed)
+        os.replace(tmp_path, sibling)
+        written += len(compressed)
+    return len(data), written
+
+def compress_outputs(output_dir, formats, min_size=DEFAULT_MIN_SIZE, workers=None, index_path=None):
+    # Writes precompressed siblings (page.html.gz, ...) for every text output
+    # of at least min_size bytes. Files whose content hash matches the last
+    # run and whose siblings still exist are skipped, and siblings left behind
+    # by removed or shrunk outputs are deleted. zlib, brotli and zstd release
+    # the GIL while compressing, so a thread pool keeps every core busy.
+    stats = CompressStats()
+    previous = load_state(index_path, COMPRESS_INDEX_VERSION).get("entries", {})
+    entries = {}
+    pending = []
+    siblings = []
+    suffixes = tuple(COMPRESSED_SUFFIXES.values())
+
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(suffixes):
+                siblings.append(path)
+                continue
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            if os.path.getsize(path) < min_size:
+                stats.too_small += 1
+                continue
+
+            entries[path] = {"sha256": hash_file(path), "formats": list(formats)}
+            if previous.get(path) == entries[path] and all(os.path.exists(sibling) for sibling in compressed_siblings(path, formats)):
+                stats.unchanged += 1
+            else:
+                pending.append(path)
+
+    expected = {sibling for path in entries for sibling in compressed_siblings(path, formats)}
+    for sibling in siblings:
+        # only siblings of compressible outputs are ours; static archives such as data.tar.gz are left alone
+        base = os.path.splitext(sibling)[0]
+        if sibling not in expected and os.path.splitext(base)[1] in COMPRESSIBLE_EXTENSIONS:
+            os.remove(sibling)
+            stats.removed += 1
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for bytes_in, bytes_out in executor.map(lambda path: _compress_file(path, formats), pending):
+            stats.compressed += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+
+    if index_path is not None:
+        save_state(index_path, COMPRESS_INDEX_VERSION, {"entries": entries})
+    return stats
@@ -0,0 +1,125 @@
+import io, json, os, time
+import socket
+import socketserver
+import threading
+
+from contextlib import redirect_stdout
+
+
+# The build server protocol: one JSON object per line in each direction.
+# A request is {"command": ..., "id": ...} plus command arguments; every
+# request gets exactly one response {"ok": bool, "ms": float, "log": [...]}
+# with the handler's result, or "error" when it raised. "id" is echoed back.
+SHUTDOWN_COMMAND = "shutdown"
+
+def handle_request(line, handler):
+    # Returns (response line, whether to stop serving).
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("a request must be a JSON object")
+    except ValueError as e:
+        return json.dumps({"ok": False, "error": f"Invalid request: {e}", "ms": 0.0, "log": []}), False
+    return json.dumps(respond(request, handler)), request.get("command") == SHUTDOWN_COMMAND
+
+def respond(request, handler):
+    # Whatever the build prints is returned in "log" rather than written to
+    # the protocol stream.
+    start = time.perf_counter()
+    log = io.StringIO()
+    try:
+        if request.get("command") == SHUTDOWN_COMMAND:
+            response = {"ok": True}
+        else:
+            with redirect_stdout(log):
+                response = dict(handler(request) or {}, ok=True)
+    except Exception as e:
+        response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    response["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    response["log"] = log.getvalue().splitlines()
+    if "id" in request:
+        response["id"] = request["id"]
+    return response
+
+def serve_stream(handler, input_stream, output_stream, first_request=None, after=None):
+    # Serves requests read from input_stream (e.g. stdin) until a shutdown
+    # request or the end of the input. A first_request is answered before
+    # anything is read. after() runs once each response is sent, for work
+    # the client shouldn't wait for.
+    if first_request is not None:
+        output_stream.write(f"{json.dumps(respond(first_request, handler))}\n")
+        output_stream.flush()
+        run_after(after)
+    for line in input_stream:
+        if not line.strip():
+            continue
+        response, stop = handle_request(line, handler)
+        output_stream.write(f"{response}\n")
+        output_stream.flush()
+        if stop:
+            break
+        run_after(after)
+
+def run_after(after):
+    if after is None:
+        return
+    try:
+        after()
+    except Exception as e:
+        print(f"After-request work failed: {type(e).__name__}: {e}")
+
+class _SocketRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            # one build at a time, whichever connection it comes from
+            with self.server.lock:
+                response, stop = handle_request(line.decode(), self.server.handler)
+                self.wfile.write(f"{response}\n".encode())
+                self.wfile.flush()
+                if stop:
+                    threading.Thread(target=self.server.shutdown).start()
+                    return
+                run_after(self.server.after)
+
+def serve_socket(path, handler, ready=None, after=None):
+    # Serves requests on a Unix socket at path until a shutdown request,
+    # calling ready(server) once it listens and after() like serve_stream.
+    # A socket file left behind by a server that is gone is replaced.
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(path)
+        else:
+            raise Exception(f"A build server is already listening on '{path}'")
+        finally:
+            probe.close()
+
+    server = socketserver.ThreadingUnixStreamServer(path, _SocketRequestHandler)
+    server.daemon_threads = True
+    server.handler = handler
+    server.after = after
+    server.lock = threading.Lock()
+    try:
+        if ready is not None:
+            ready(server)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+def send_request(path, request, timeout=None):
+    # Client side: sends one request to the server at path and returns its response.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(path)
+        client.sendall(f"{json.dumps(request)}\n".encode())
+        with client.makefile('rb') as stream:
+            line = stream.readline()
+    if not line:
+        raise Exception(f"The build server on '{path}' closed the connection without answering")
+    return json.loads(line)
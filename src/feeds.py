@@ -0,0 +1,181 @@
+import os
+
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape, quoteattr
+
+from listings import BLOG_SECTION, blog_posts
+
+
+SITEMAP_FILE = "sitemap.xml"
+SITEMAP_MAX_URLS = 50000 # the sitemaps.org limit for a single file
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+FEED_FILE = "feed.xml" # written inside the blog section
+FEED_MAX_ENTRIES = 20
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+class XmlWriter():
+    # Writes an XML document straight into a stream, one element at a time,
+    # so sitemaps of any size never exist in memory as a whole.
+    def __init__(self, stream):
+        self.stream = stream
+        self.open_tags = []
+        stream.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    def start(self, tag, attributes=None):
+        self.stream.write(f"<{tag}{self._attributes(attributes)}>\n")
+        self.open_tags.append(tag)
+
+    def element(self, tag, text=None, attributes=None):
+        if text is None:
+            self.stream.write(f"<{tag}{self._attributes(attributes)}/>\n")
+        else:
+            self.stream.write(f"<{tag}{self._attributes(attributes)}>{escape(str(text))}</{tag}>\n")
+
+    def end(self):
+        self.stream.write(f"</{self.open_tags.pop()}>\n")
+
+    def close(self):
+        while self.open_tags:
+            self.end()
+
+    def _attributes(self, attributes):
+        if not attributes:
+            return ""
+        return "".join(f" {name}={quoteattr(str(value))}" for name, value in attributes.items())
+
+def write_xml(path, write):
+    # Calls write(XmlWriter) on a temporary sibling of path, then moves it into place.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w') as file:
+            writer = XmlWriter(file)
+            write(writer)
+            writer.close()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+def absolute_url(site_url, basepath, url):
+    return f"{site_url.rstrip('/')}{(basepath or '/').rstrip('/')}{url}"
+
+def timestamp(value):
+    # RFC 3339 timestamp of a front matter date; dates without a time zone are UTC.
+    moment = datetime.fromisoformat(str(value))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.isoformat().replace("+00:00", "Z")
+
+def sitemap_files(url_count, max_urls=SITEMAP_MAX_URLS):
+    # One sitemap.xml, or a sitemap.xml index of sitemap-N.xml files when
+    # there are more URLs than one sitemap may hold.
+    if url_count <= max_urls:
+        return [SITEMAP_FILE]
+    return [SITEMAP_FILE] + [f"sitemap-{i}.xml" for i in range(1, -(-url_count // max_urls) + 1)]
+
+def write_sitemaps(entries, output_dir, site_url, basepath=None, max_urls=SITEMAP_MAX_URLS):
+    # entries are (url, date or None) pairs. Returns the paths written.
+    files = sitemap_files(len(entries), max_urls)
+
+    def write_urls(chunk):
+        def write(writer):
+            writer.start("urlset", {"xmlns": SITEMAP_NAMESPACE})
+            for url, date in chunk:
+                writer.start("url")
+                writer.element("loc", absolute_url(site_url, basepath, url))
+                if date:
+                    writer.element("lastmod", timestamp(date))
+                writer.end()
+        return write
+
+    def write_index(writer):
+        writer.start("sitemapindex", {"xmlns": SITEMAP_NAMESPACE})
+        for name in files[1:]:
+            writer.start("sitemap")
+            writer.element("loc", absolute_url(site_url, basepath, f"/{name}"))
+            writer.end()
+
+    paths = [os.path.join(output_dir, name) for name in files]
+    if len(files) == 1:
+        write_xml(paths[0], write_urls(entries))
+        return paths
+    for i, path in enumerate(paths[1:]):
+        write_xml(path, write_urls(entries[i * max_urls:(i + 1) * max_urls]))
+    write_xml(paths[0], write_index)
+    return paths
+
+def feed_posts(records, section=BLOG_SECTION, max_entries=FEED_MAX_ENTRIES):
+    # The newest posts of the section; a feed entry needs a date, so posts
+    # without one are left out.
+    return [post for post in blog_posts(records, section) if post.get("date")][:max_entries]
+
+def write_atom_feed(posts, path, site_url, basepath=None, title="Blog", section=BLOG_SECTION):
+    section_url = absolute_url(site_url, basepath, f"/{section}/")
+
+    def write(writer):
+        writer.start("feed", {"xmlns": ATOM_NAMESPACE})
+        writer.element("title", title)
+        writer.element("id", section_url)
+        writer.element("link", attributes={"href": section_url})
+        writer.element("link", attributes={"rel": "self", "href": absolute_url(site_url, basepath, f"/{section}/{FEED_FILE}")})
+        writer.element("updated", timestamp(posts[0]["date"]))
+        writer.start("author")
+        writer.element("name", urlparse(site_url).netloc or site_url)
+        writer.end()
+        for post in posts:
+            url = absolute_url(site_url, basepath, post["url"])
+            writer.start("entry")
+            writer.element("title", post.get("title") or post["url"])
+            writer.element("id", url)
+            writer.element("link", attributes={"href": url})
+            writer.element("updated", timestamp(post["date"]))
+            if post.get("author"):
+                writer.start("author")
+                writer.element("name", post["author"])
+                writer.end()
+            if post.get("summary"):
+                writer.element("summary", post["summary"])
+            writer.end()
+
+    write_xml(path, write)
+    return path
+
+class SiteFeeds():
+    # The sitemap and Atom feed of a build, written from the site index
+    # records gathered while discovering pages.
+    def __init__(self, site_url, sitemap=True, feed=True, max_urls=SITEMAP_MAX_URLS, max_entries=FEED_MAX_ENTRIES):
+        self.site_url = site_url
+        self.sitemap = sitemap
+        self.feed = feed
+        self.max_urls = max_urls
+        self.max_entries = max_entries
+
+    def outputs(self, records, extra_urls=()):
+        # Paths (relative to the output directory) that write() will produce.
+        outputs = []
+        if self.sitemap:
+            outputs.extend(sitemap_files(len(records) + len(extra_urls), self.max_urls))
+        if self.feed and feed_posts(records, max_entries=1):
+            outputs.append(f"{BLOG_SECTION}/{FEED_FILE}")
+        return outputs
+
+    def write(self, output_dir, records, extra_urls=(), basepath=None):
+        # extra_urls are generated pages, such as listings, that have no record.
+        paths = []
+        if self.sitemap:
+            entries = [(record["url"], record.get("date")) for record in records]
+            entries.extend((url, None) for url in extra_urls)
+            paths.extend(write_sitemaps(entries, output_dir, self.site_url, basepath, self.max_urls))
+            print(f"Wrote {paths[0]} with {len(entries)} URL(s) in {max(1, len(paths) - 1)} sitemap(s).")
+        if self.feed:
+            posts = feed_posts(records, max_entries=self.max_entries)
+            if posts:
+                path = write_atom_feed(posts, os.path.join(output_dir, BLOG_SECTION, FEED_FILE), self.site_url, basepath)
+                print(f"Wrote {path} with {len(posts)} entries.")
+                paths.append(path)
+            else:
+                print(f"No dated posts in {BLOG_SECTION}/, not writing a feed.")
+        return paths
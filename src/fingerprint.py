@@ -0,0 +1,62 @@
+import os, json
+
+from assets import walk_files
+from manifest import hash_file
+from state import load_state, save_state
+
+
+FINGERPRINT_LENGTH = 10
+ASSET_MANIFEST_FILE = "asset-manifest.json"
+HASH_INDEX_VERSION = 1
+
+def fingerprinted_name(relative_path, digest):
+    # images/tom.png -> images/tom.<hash>.png
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+class AssetHashIndex():
+    # sha256 of every static file, reused across builds while a file's size
+    # and mtime are unchanged, so each asset is hashed at most once per change.
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        return cls(path, load_state(path, HASH_INDEX_VERSION).get("entries", {}))
+
+    def save(self):
+        save_state(self.path, HASH_INDEX_VERSION, {"entries": self.entries})
+
+    def digest(self, path, stat):
+        cached = self.entries.get(path)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["sha256"]
+        digest = hash_file(path)
+        self.entries[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+        return digest
+
+def build_asset_map(static_dir, hash_index):
+    # Maps every static file's URL path to its fingerprinted URL path, both
+    # relative to the site root: {"images/tom.png": "images/tom.1a2b3c4d5e.png"}.
+    asset_map = {}
+    seen = set()
+    if os.path.isdir(static_dir):
+        for source_path, relative_path, stat in walk_files(static_dir, ""):
+            seen.add(source_path)
+            url_path = relative_path.replace(os.sep, "/")
+            asset_map[url_path] = fingerprinted_name(url_path, hash_index.digest(source_path, stat))
+
+    hash_index.entries = {path: entry for path, entry in hash_index.entries.items() if path in seen}
+    return asset_map
+
+def fingerprinted_dest(dest_path, output_dir, asset_map):
+    relative_path = os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    return os.path.join(output_dir, *asset_map.get(relative_path, relative_path).split("/"))
+
+def write_asset_manifest(output_dir, asset_map):
+    path = os.path.join(output_dir, ASSET_MANIFEST_FILE)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(asset_map, file, indent=2, sort_keys=True)
+    return path
@@ -0,0 +1,128 @@
+import datetime
+
+from contextlib import contextmanager
+from html import escape
+from block_markdown import common_indent_of_lines, find_title
+
+
+FRONT_MATTER_DELIMITER = "---"
+LIST_FIELDS = {"tags"}
+BOOLEAN_FIELDS = {"draft"}
+DATE_FIELDS = {"date"}
+
+def parse_value(value):
+    # Scalars are strings unless quoted, [bracketed] lists or true/false.
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item.strip()) for item in value[1:-1].split(",") if item.strip()]
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+def parse_front_matter(lines):
+    # A small YAML subset: "key: value" lines, plus "- item" lines listing
+    # the values of the key above them. Blank lines and # comments are skipped.
+    meta = {}
+    list_key = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("- ") and list_key is not None:
+            meta[list_key] = meta[list_key] or []
+            meta[list_key].append(parse_value(line[2:].strip()))
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"Invalid front matter line '{line}', expected 'key: value'")
+        key, value = key.strip(), value.strip()
+        if value:
+            meta[key] = parse_value(value)
+            list_key = None
+        else:
+            # an empty value starts a "- item" list; without items it stays ""
+            meta[key] = ""
+            list_key = key
+    return normalize_metadata(meta)
+
+def normalize_metadata(meta):
+    for key in LIST_FIELDS & meta.keys():
+        if isinstance(meta[key], str):
+            meta[key] = [item.strip() for item in meta[key].split(",") if item.strip()]
+    for key in BOOLEAN_FIELDS & meta.keys():
+        if not isinstance(meta[key], bool):
+            raise ValueError(f"Front matter '{key}' must be true or false, got '{meta[key]}'")
+    for key in DATE_FIELDS & meta.keys():
+        try:
+            datetime.datetime.fromisoformat(str(meta[key]))
+        except ValueError:
+            raise ValueError(f"Front matter '{key}' must be an ISO date like 2024-01-31, got '{meta[key]}'")
+    if "title" in meta:
+        meta["title"] = str(meta["title"])
+    return meta
+
+def template_variables(meta):
+    # Front matter as {{ name }} template variables, escaped for use in text
+    # or attribute values: lists are joined with ", ", booleans are true/false.
+    variables = {}
+    for key, value in meta.items():
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        elif isinstance(value, bool):
+            value = "true" if value else "false"
+        variables[key] = escape(str(value))
+    return variables
+
+def split_front_matter(markdown):
+    # Returns (metadata, body). A page has front matter when its first line
+    # is '---'; the block runs up to the next '---' line.
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].rstrip() != FRONT_MATTER_DELIMITER:
+        return {}, markdown
+    for i in range(1, len(lines)):
+        if lines[i].rstrip() == FRONT_MATTER_DELIMITER:
+            return parse_front_matter(lines[1:i]), "\n".join(lines[i + 1:])
+    raise ValueError("Front matter is missing its closing '---' line")
+
+def read_front_matter(path):
+    # Reads only the front matter lines of a page, not its body.
+    with open(path, 'r') as file:
+        return _read_front_matter(file, path)
+
+def read_page_header(path):
+    # Front matter plus a title, reading no further into the file than the
+    # first '# ' heading when the front matter doesn't set one. The heading
+    # is found the way the rendered page finds it, see find_title.
+    with open_page_body(path) as (meta, file):
+        if "title" in meta:
+            return meta
+        indent = common_indent_of_lines(file)
+    with open_page_body(path) as (_, file):
+        try:
+            meta["title"] = find_title(file, indent)
+        except Exception:
+            pass # untitled; rendering the page reports it
+    return meta
+
+@contextmanager
+def open_page_body(path):
+    # Yields (metadata, file) with the file positioned after the front matter,
+    # for reading a page's body line by line.
+    with open(path, 'r') as file:
+        yield _read_front_matter(file, path), file
+
+def _read_front_matter(file, path):
+    first_line = file.readline()
+    if first_line.rstrip() != FRONT_MATTER_DELIMITER:
+        # no front matter; rewind so the caller sees the first line too
+        file.seek(0)
+        return {}
+    lines = []
+    for line in file:
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            return parse_front_matter(lines)
+        lines.append(line)
+    raise ValueError(f"Front matter in {path} is missing its closing '---' line")
@@ -1,54 +1,68 @@
 class HTMLNode():
+    # Pages allocate tens of thousands of nodes; slots drop the per-instance __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
-    
+
     def to_html(self):
+        parts = []
+        self.emit_html(parts.append)
+        return "".join(parts)
+
+    def write_html(self, stream):
+        # Serializes straight into a file-like object, chunk by chunk, without
+        # building the whole document as one string first.
+        self.emit_html(stream.write)
+
+    def emit_html(self, emit):
+        # Calls emit(chunk) for every piece of serialized output, in order.
         raise NotImplementedError("to_html method not implemented")
-    
+
     def props_to_html(self):
-        if self.props is None:
+        if not self.props:
             return ""
-        
-        html_string = ""
-        for key in self.props:
-            html_string += f' {key}="{self.props[key]}"'
-        return html_string
-    
+        return "".join([f' {key}="{value}"' for key, value in self.props.items()])
+
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
-    
+
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
-    
-    def to_html(self):
+
+    def emit_html(self, emit):
         if self.value is None:
             raise ValueError("leaf nodes must have a value")
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-    
+            emit(self.value)
+        else:
+            emit(f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>")
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
-    
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
-    
-    def to_html(self):
+
+    def emit_html(self, emit):
         if self.tag is None:
             raise ValueError("parent nodes must have a tag")
         if self.children == [] or self.children is None:
             raise ValueError("parent nodes must have children")
-        
-        html_string = ""
+
+        emit(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            html_string += child.to_html()
-        
-        return f"<{self.tag}{self.props_to_html()}>{html_string}</{self.tag}>"
-    
+            child.emit_html(emit)
+        emit(f"</{self.tag}>")
+
     def __repr__(self):
-        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
+        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -1,15 +1,96 @@
 import re
 
+from contextlib import contextmanager
 from textnode import TextNode, TextType
 
 
+IMAGE_REGEX_PATTERN = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
+LINK_REGEX_PATTERN = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
+INLINE_TOKEN_REGEX_PATTERN = r"\*\*|[_`\[]|!\["
+
+_image_regex = re.compile(IMAGE_REGEX_PATTERN)
+_link_regex = re.compile(LINK_REGEX_PATTERN)
+_inline_token_regex = re.compile(INLINE_TOKEN_REGEX_PATTERN)
+
+DELIMITER_TEXT_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+_collected_links = None # URLs of links and images parsed inside collect_links()
+
+@contextmanager
+def collect_links():
+    # Collects the URL of every LINK and IMAGE node text_to_textnodes creates
+    # inside the block. Nested collections also add to the enclosing one.
+    global _collected_links
+    previous = _collected_links
+    _collected_links = links = []
+    try:
+        yield links
+    finally:
+        _collected_links = previous
+        if previous is not None:
+            previous.extend(links)
+
+def add_collected_links(links):
+    # For links of content that is not parsed again, like cached blocks.
+    if _collected_links is not None:
+        _collected_links.extend(links)
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single left-to-right scan: jump to the next token that can open an inline
+    # element, emit the plain text before it, then consume the whole element.
+    # Delimited content is taken verbatim, so markup inside `code` or a link
+    # URL is never re-interpreted.
+    if text == "":
+        return [TextNode(text, TextType.TEXT)]
+
+    nodes = []
+    position = 0
+    pending_start = 0
+    length = len(text)
+
+    while position < length:
+        token = _inline_token_regex.search(text, position)
+        if token is None:
+            break
+
+        start = token.start()
+        delimiter = token.group()
+        if delimiter in DELIMITER_TEXT_TYPES:
+            content_start = start + len(delimiter)
+            end = text.find(delimiter, content_start)
+            if end == -1:
+                raise ValueError(f"Invalid markdown: Unclosed delimiter {delimiter}")
+            node = None
+            if end > content_start:
+                node = TextNode(text[content_start:end], DELIMITER_TEXT_TYPES[delimiter])
+            next_position = end + len(delimiter)
+        else:
+            if delimiter == "![":
+                match = _image_regex.match(text, start)
+                node_type = TextType.IMAGE
+            else:
+                match = _link_regex.match(text, start)
+                node_type = TextType.LINK
+            if match is None:
+                position = start + 1
+                continue
+            node = TextNode(match.group(1), node_type, match.group(2))
+            next_position = match.end()
+            if _collected_links is not None:
+                _collected_links.append(node.url)
+
+        if start > pending_start:
+            nodes.append(TextNode(text[pending_start:start], TextType.TEXT))
+        if node is not None:
+            nodes.append(node)
+        position = pending_start = next_position
+
+    if pending_start < length:
+        nodes.append(TextNode(text[pending_start:], TextType.TEXT))
     return nodes
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -38,12 +119,12 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def split_nodes_image(old_nodes):
-    return _split_nodes_by_pattern(old_nodes, extract_markdown_images, "!", TextType.IMAGE)
+    return _split_nodes_by_pattern(old_nodes, _image_regex, TextType.IMAGE)
 
 def split_nodes_link(old_nodes):
-    return _split_nodes_by_pattern(old_nodes, extract_markdown_links, "", TextType.LINK)
+    return _split_nodes_by_pattern(old_nodes, _link_regex, TextType.LINK)
 
-def _split_nodes_by_pattern(old_nodes, extract_func, prefix, node_type):
+def _split_nodes_by_pattern(old_nodes, regex, node_type):
     new_nodes = []
 
     for node in old_nodes:
@@ -51,38 +132,22 @@ def _split_nodes_by_pattern(old_nodes, extract_func, prefix, node_type):
             new_nodes.append(node)
             continue
 
-        current_text = node.text
-        extracted_items = extract_func(current_text)
-        
-        if len(extracted_items) == 0:
-            new_nodes.append(node)
-            continue
+        position = 0
+        for match in regex.finditer(node.text):
+            if match.start() > position:
+                new_nodes.append(TextNode(node.text[position:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), node_type, match.group(2)))
+            position = match.end()
 
-        for item_text, url in extracted_items:
-            pattern = f"{prefix}[{item_text}]({url})"
-            split_nodes = current_text.split(pattern, 1)
-
-            if split_nodes[0]:
-                new_nodes.append(TextNode(split_nodes[0], TextType.TEXT))
-
-            new_nodes.append(TextNode(item_text, node_type, url))        
-            
-            if len(split_nodes) > 1:
-                current_text = split_nodes[1]
-            else:
-                current_text = ""
-        
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+        if position == 0:
+            new_nodes.append(node)
+        elif position < len(node.text):
+            new_nodes.append(TextNode(node.text[position:], TextType.TEXT))
 
     return new_nodes
 
 def extract_markdown_images(text):
-    regex_pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(regex_pattern, text)
-    return matches
+    return _image_regex.findall(text)
 
 def extract_markdown_links(text):
-    regex_pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(regex_pattern, text)
-    return matches
\ No newline at end of file
+    return _link_regex.findall(text)
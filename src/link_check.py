@@ -0,0 +1,103 @@
+import os, posixpath
+
+from urllib.parse import unquote, urlsplit
+from state import load_state, save_state
+
+
+LINK_INDEX_VERSION = 1
+MAX_REPORTED_LINKS = 50
+
+class LinkIndex():
+    # The link and image URLs of every page, as collected while rendering it:
+    #   source path -> {"dest": output path, "links": [url, ...]}
+    # Kept on disk so incremental builds can still check the links of pages
+    # they don't render again.
+    def __init__(self, path, pages=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        return cls(path, load_state(path, LINK_INDEX_VERSION).get("pages", {}))
+
+    def save(self):
+        save_state(self.path, LINK_INDEX_VERSION, {"pages": self.pages})
+
+    def __contains__(self, source_path):
+        return str(source_path) in self.pages
+
+    def update(self, page_links):
+        # page_links: source path -> (output path, [url, ...])
+        for source_path, (dest_path, links) in page_links.items():
+            self.pages[str(source_path)] = {"dest": str(dest_path), "links": links}
+
+    def prune(self, sources):
+        sources = {str(source) for source in sources}
+        self.pages = {path: entry for path, entry in self.pages.items() if path in sources}
+
+def output_paths(output_dir):
+    # Every file in the output directory, as '/'-separated paths relative to it.
+    paths = set()
+    for directory, _, files in os.walk(output_dir):
+        relative_dir = os.path.relpath(directory, output_dir).replace(os.sep, "/")
+        prefix = "" if relative_dir == "." else f"{relative_dir}/"
+        paths.update(f"{prefix}{name}" for name in files)
+    return paths
+
+def link_targets(url, page_path):
+    # The output paths a link from page_path may resolve to, in the order a
+    # static file server tries them. None for links this checker doesn't
+    # follow: other sites, mailto: and the like, and same-page anchors.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        target = posixpath.normpath(path).lstrip("/")
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(page_path), path))
+    if target in ("", "."):
+        return ("index.html",)
+    if path.endswith("/"):
+        return (f"{target}/index.html",)
+    return (target, f"{target}.html", f"{target}/index.html")
+
+class LinkReport():
+    def __init__(self):
+        self.checked = 0
+        self.skipped = 0
+        self.dangling = [] # (source path, url)
+
+    def __str__(self):
+        lines = [f"Link check: {self.checked} link(s) checked, {len(self.dangling)} dangling, {self.skipped} external or anchor link(s) skipped."]
+        for source_path, url in self.dangling[:MAX_REPORTED_LINKS]:
+            lines.append(f"  {source_path}: {url}")
+        if len(self.dangling) > MAX_REPORTED_LINKS:
+            lines.append(f"  ... and {len(self.dangling) - MAX_REPORTED_LINKS} more.")
+        return "\n".join(lines)
+
+def check_links(link_index, outputs, output_dir):
+    # One set lookup per candidate target, so the check is linear in the
+    # number of links and never reads the generated HTML.
+    report = LinkReport()
+    resolved = {} # URLs that resolve the same from every page -> found, or None when not followed
+    for source_path, entry in link_index.pages.items():
+        page_path = None
+        for url in entry["links"]:
+            if url in resolved:
+                found = resolved[url]
+            else:
+                if page_path is None:
+                    page_path = os.path.relpath(entry["dest"], output_dir).replace(os.sep, "/")
+                targets = link_targets(url, page_path)
+                found = None if targets is None else any(target in outputs for target in targets)
+                if targets is None or url.startswith("/"):
+                    resolved[url] = found
+            if found is None:
+                report.skipped += 1
+            elif found:
+                report.checked += 1
+            else:
+                report.checked += 1
+                report.dangling.append((source_path, url))
+    return report
@@ -0,0 +1,98 @@
+import hashlib, json, re
+
+from html import escape
+
+from htmlnode import LeafNode, ParentNode
+
+
+BLOG_SECTION = "blog" # pages under content/blog/ are the posts that get listed
+DEFAULT_PAGE_SIZE = 10
+LISTING_FIELDS = ("title", "url", "date") # what a listing shows of each post
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-")
+
+def blog_posts(records, section=BLOG_SECTION):
+    # Site index records of the section's posts, newest first; posts without
+    # a date come last, and posts with the same date are ordered by title.
+    prefix = f"/{section}/"
+    posts = [record for record in records if record["url"].startswith(prefix) and record["url"] != prefix]
+    posts.sort(key=lambda post: post.get("title", ""))
+    posts.sort(key=lambda post: str(post.get("date", "")), reverse=True)
+    return posts
+
+class ListingPage():
+    # One page of a generated listing, written to `path` (relative to the
+    # output directory) and served at `url`.
+    def __init__(self, name, url, posts, page_number, page_count, base_url):
+        self.url = url
+        self.path = f"{url.lstrip('/')}index.html"
+        self.title = name if page_count == 1 else f"{name} (page {page_number} of {page_count})"
+        self.posts = [{key: post[key] for key in LISTING_FIELDS if key in post} for post in posts]
+        self.page_number = page_number
+        self.page_count = page_count
+        self.base_url = base_url
+
+    def page_url(self, page_number):
+        return self.base_url if page_number == 1 else f"{self.base_url}page/{page_number}/"
+
+    def digest(self):
+        # Changes whenever anything shown on the page does, so unchanged
+        # listings are not rewritten.
+        data = [self.title, self.posts, self.page_number, self.page_count, self.base_url]
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    def to_html_node(self):
+        items = []
+        for post in self.posts:
+            children = [LeafNode("a", escape(post.get("title") or post["url"], quote=False), {"href": post["url"]})]
+            if "date" in post:
+                children.append(LeafNode(None, " "))
+                children.append(LeafNode("time", escape(str(post["date"]))))
+            items.append(ParentNode("li", children))
+        children = [LeafNode("h1", escape(self.title, quote=False)), ParentNode("ul", items)]
+
+        links = []
+        if self.page_number > 1:
+            links.append(LeafNode("a", "Newer posts", {"href": self.page_url(self.page_number - 1), "rel": "prev"}))
+        if self.page_number < self.page_count:
+            links.append(LeafNode("a", "Older posts", {"href": self.page_url(self.page_number + 1), "rel": "next"}))
+        if links:
+            children.append(ParentNode("nav", links))
+        return ParentNode("div", children)
+
+def paginate(base_url, name, posts, page_size):
+    page_count = max(1, -(-len(posts) // page_size))
+    pages = []
+    for page_number in range(1, page_count + 1):
+        url = base_url if page_number == 1 else f"{base_url}page/{page_number}/"
+        page_posts = posts[(page_number - 1) * page_size:page_number * page_size]
+        pages.append(ListingPage(name, url, page_posts, page_number, page_count, base_url))
+    return pages
+
+def plan_listings(records, page_size=DEFAULT_PAGE_SIZE, section=BLOG_SECTION):
+    # The blog index, one listing per tag and one per year of posts, each
+    # split into pages of page_size posts.
+    if page_size < 1:
+        raise ValueError(f"Listing page size must be at least 1, got {page_size}")
+    posts = blog_posts(records, section)
+    if not posts:
+        return []
+
+    tags = {}
+    years = {}
+    for post in posts:
+        for tag in post.get("tags", []):
+            slug = slugify(tag)
+            if slug:
+                tags.setdefault(slug, (tag, []))[1].append(post)
+        if post.get("date"):
+            years.setdefault(str(post["date"])[:4], []).append(post)
+
+    listings = paginate(f"/{section}/", "Blog", posts, page_size)
+    for slug in sorted(tags):
+        tag, tagged = tags[slug]
+        listings.extend(paginate(f"/{section}/tags/{slug}/", f"Posts tagged {tag}", tagged, page_size))
+    for year in sorted(years, reverse=True):
+        listings.extend(paginate(f"/{section}/archive/{year}/", f"Posts from {year}", years[year], page_size))
+    return listings
@@ -1,15 +1,44 @@
-import os, sys
+import io, os, sys, time
+import argparse
+import socket
 import shutil
+import profiler
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 from pathlib import Path
-from block_markdown import extract_title, markdown_to_html_node
+from block_markdown import BlockStreamNode, common_indent_of_lines, extract_title, find_title, markdown_to_html_node
+from assets import copy_file, copy_files, plan_sync
+from block_cache import BlockCache, DEFAULT_MAX_ENTRIES
+from daemon import serve_socket, serve_stream
+from compress import COMPRESSED_SUFFIXES, COMPRESSIBLE_EXTENSIONS, DEFAULT_MIN_SIZE, available_formats, compress_outputs
+from front_matter import open_page_body, read_front_matter, split_front_matter, template_variables
+from fingerprint import ASSET_MANIFEST_FILE, AssetHashIndex, build_asset_map, fingerprinted_dest, write_asset_manifest
+from manifest import BuildManifest
+from minify import HtmlMinifier
+from profiler import BuildProfiler
+from feeds import SiteFeeds
+from inline_markdown import collect_links
+from link_check import LinkIndex, check_links, output_paths
+from listings import DEFAULT_PAGE_SIZE, plan_listings
+from site_index import SiteIndex
+from template import BASEPATH_PLACEHOLDER, DIR_LAYOUTS, UNQUOTABLE_CHARACTERS, Template, fill_basepath, placeholder_only_in_links, resolve_template
+from watch import LiveReload, changed_paths, serve, snapshot, watch
 
 
 DIR_STATIC = "static"
 DIR_DOCS = "docs" # for GitHub Pages deployment
 DIR_PUBLIC = "public" # for local deployment
 DIR_CONTENT = "content"
-TEMPLATE_FILE = "template.html"
+TEMPLATE_FILE = "template.html" # a file with the same name in a content directory overrides it for that section
+DIR_PARTIALS = "partials" # conventional home of {{> partial }} includes, watched for changes
+MAX_PAGE_BATCH = 64
+DIR_CACHE = ".cache" # build state kept between runs, never deployed
+DEV_SERVER_PORT = 8888
+BLOCK_CACHE_FILE = os.path.join(DIR_CACHE, "blocks.json")
+ASSET_HASH_INDEX_FILE = os.path.join(DIR_CACHE, "asset-hashes.json")
+SITE_INDEX_FILE = os.path.join(DIR_CACHE, "site-index.json")
+LARGE_PAGE_SIZE = 16 * 1024 * 1024 # sources at least this big are streamed, see generate_large_page
 
 def prepare_directory(source, destination):
     if not os.path.exists(source) or os.listdir(source) == []:
@@ -22,7 +51,7 @@ def prepare_directory(source, destination):
         os.mkdir(destination)
     else:
         print(f"Destination '{destination}' doesn't exist. Creating it.")
-        os.mkdir(destination)
+        os.makedirs(destination)
 
     source_contents = os.listdir(source)
     if source_contents != []:
@@ -36,47 +65,704 @@ def prepare_directory(source, destination):
                 print(f"Processing {obj_path}.")
                 prepare_directory(obj_path, dest_path)
 
-def generate_page(from_path, template_path, dest_path, basepath=None):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def generate_page(from_path, template_path, dest_path, basepath=None, block_cache=None, asset_map=None, minify=False, targets=None):
+    # With targets, a list of (destination, basepath) pairs, the page is
+    # written to each of them instead of dest_path.
+    if os.path.getsize(from_path) >= LARGE_PAGE_SIZE:
+        return generate_large_page(from_path, template_path, dest_path, basepath, block_cache, asset_map, minify, targets)
+
+    with profiler.page(from_path):
+        with profiler.span("read"):
+            with open(from_path, 'r') as file:
+                markdown_file = file.read()
+            meta, markdown_file = split_front_matter(markdown_file)
+        template_path = resolve_template(from_path, template_path, meta.get("layout"))
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-    with open(from_path, 'r') as file:
-        markdown_file = file.read()
+        with profiler.span("markdown_to_html_node"), collect_links() as links:
+            html_node = markdown_to_html_node(markdown_file, block_cache)
+        with profiler.span("extract_title"):
+            page_title = meta.get("title") or extract_title(markdown_file)
 
-    markdown_html = markdown_to_html_node(markdown_file).to_html()
-    page_title = extract_title(markdown_file)
+        if targets is not None:
+            write_page_targets(Template.from_file(template_path), page_title, html_node, targets, asset_map, minify, template_variables(meta))
+        else:
+            write_page(Template.from_file(template_path), page_title, html_node, dest_path, basepath, asset_map, minify, template_variables(meta))
+    return links
 
-    with open(template_path, 'r') as file:
-        template_file = file.read()
-    new_page = template_file.replace("{{ Title }}", page_title)
-    new_page = new_page.replace("{{ Content }}", markdown_html)
+def generate_large_page(from_path, template_path, dest_path, basepath=None, block_cache=None, asset_map=None, minify=False, targets=None):
+    # generate_page for sources too big to hold in memory a few times over
+    # (as a string, its lines and its node tree). The file is read line by
+    # line: once for the common indent and once for the title, both of which
+    # usually stop within the first lines, then once more while every block
+    # is parsed and written to the destination before the next is read.
+    with profiler.page(from_path):
+        with profiler.span("read"), open_page_body(from_path) as (meta, file):
+            indent = common_indent_of_lines(file)
+        template_path = resolve_template(from_path, template_path, meta.get("layout"))
+        print(f"Generating large page from {from_path} to {dest_path} using {template_path}")
 
-    if basepath:
-        new_page = new_page.replace('href="/', f'href="{basepath}')
-        new_page = new_page.replace('src="/', f'src="{basepath}')
+        page_title = meta.get("title")
+        if not page_title:
+            with profiler.span("extract_title"), open_page_body(from_path) as (_, file):
+                page_title = find_title(file, indent)
 
-    if not os.path.exists(os.path.dirname(dest_path)):
-        os.makedirs(os.path.dirname(dest_path))
+        # the streamed body can't be kept for a second write, so every target is rendered on its own
+        for target_path, target_basepath in targets or [(dest_path, basepath)]:
+            with open_page_body(from_path) as (_, file), collect_links() as links:
+                write_page(Template.from_file(template_path), page_title, BlockStreamNode(file, indent, block_cache), target_path, target_basepath, asset_map, minify, template_variables(meta))
+    return links
 
-    with open(dest_path, 'w') as file:
-        file.write(new_page)
-    
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath=None):
-    for node in os.listdir(dir_path_content):
-        source_path = os.path.join(dir_path_content, node)
-        dest_path = os.path.join(dest_dir_path, node)
+def write_page(template, title, html_node, dest_path, basepath=None, asset_map=None, minify=False, variables=None):
+    with profiler.span("write"):
+        write_output(dest_path, lambda file: render_page(file, template, title, html_node, basepath, asset_map, minify, variables))
+
+def render_page(stream, template, title, html_node, basepath=None, asset_map=None, minify=False, variables=None):
+    # variables are extra {{ name }} values, e.g. the page's front matter
+    stream = HtmlMinifier(stream) if minify else stream
+    template.write(stream, dict(variables or {}, Title=title, Content=html_node), basepath, asset_map)
+    if minify:
+        stream.close()
+
+def write_page_targets(template, title, html_node, targets, asset_map=None, minify=False, variables=None):
+    # Writes one page to several (destination, basepath) targets. The page is
+    # rendered once with a placeholder for the basepath, and each target only
+    # fills in its own, so N targets cost one render plus N writes. Targets
+    # whose basepath the minifier would treat differently from the
+    # placeholder are rendered on their own, as is everything when the page
+    # itself contains the placeholder.
+    shared = [(dest_path, basepath) for dest_path, basepath in targets if not (minify and UNQUOTABLE_CHARACTERS.search(basepath or "/"))]
+    if shared:
+        buffer = io.StringIO()
+        with profiler.span("render"):
+            render_page(buffer, template, title, html_node, BASEPATH_PLACEHOLDER, asset_map, minify, variables)
+        html = buffer.getvalue()
+        if not placeholder_only_in_links(html):
+            shared = []
+    for dest_path, basepath in targets:
+        if (dest_path, basepath) in shared:
+            with profiler.span("write"):
+                write_output(dest_path, lambda file: file.write(fill_basepath(html, basepath)))
+        else:
+            write_page(template, title, html_node, dest_path, basepath, asset_map, minify, variables)
+
+def write_output(dest_path, write):
+    # Calls write(file) on a temporary sibling of dest_path and moves it into
+    # place, so a page that fails halfway through serialization never leaves
+    # a truncated file.
+    # exist_ok: parallel workers may create the same directory concurrently
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        with open(tmp_path, 'w') as file:
+            write(file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, dest_path)
+
+class OutputTargets():
+    # The output directories of a multi-target build, each with its own
+    # basepath: (directory, basepath) pairs, the first being the directory
+    # page destinations are discovered in. Pages are rendered once and
+    # written to every directory.
+    def __init__(self, targets):
+        seen = set()
+        for directory, _ in targets:
+            if os.path.normpath(directory) in seen:
+                raise ValueError(f"Output directory '{directory}' is targeted more than once")
+            seen.add(os.path.normpath(directory))
+        self.targets = list(targets)
+
+    def __iter__(self):
+        return iter(self.targets)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def move(self, path, directory):
+        # path, which is inside the first target's directory, in directory instead
+        return os.path.join(directory, os.path.relpath(path, self.targets[0][0]))
+
+    def dests(self, dest_path):
+        return [(self.move(dest_path, directory), basepath) for directory, basepath in self.targets]
+
+def site_listings(records, pages, output_dir, page_size):
+    # (listing, destination) pairs of the generated blog, tag and archive
+    # listings of the site index records. A content page at the same path wins.
+    page_outputs = {str(dest_path) for _, dest_path in pages}
+    listings = []
+    for listing in plan_listings(records, page_size):
+        dest_path = os.path.join(output_dir, listing.path)
+        if dest_path in page_outputs:
+            print(f"Not generating listing {listing.url}, a content page already writes {dest_path}.")
+            continue
+        listings.append((listing, dest_path))
+    return listings
+
+def write_listings(listings, template_path, basepath=None, manifest=None, asset_map=None, minify=False, targets=None):
+    # Writes listing pages, skipping those the manifest has seen with the same
+    # posts, template and settings, so editing one post only rewrites the
+    # listings it appears on. With OutputTargets, every listing is written to
+    # each target instead.
+    template_sources = [template_path] + Template.from_file(template_path).dependencies
+    written = 0
+    for listing, dest_path in listings:
+        options = dict(render_options(minify) or {}, listing=listing.digest())
+        if manifest is not None and manifest.is_fresh(dest_path, template_sources, basepath, options):
+            continue
+        print(f"Generating listing {listing.url} to {dest_path}")
+        with profiler.page(listing.url):
+            if targets is not None:
+                write_page_targets(Template.from_file(template_path), listing.title, listing.to_html_node(), targets.dests(dest_path), asset_map, minify)
+            else:
+                write_page(Template.from_file(template_path), listing.title, listing.to_html_node(), dest_path, basepath, asset_map, minify)
+        if manifest is not None:
+            manifest.record(dest_path, template_sources, basepath, options)
+        written += 1
+    print(f"Listings: {written} of {len(listings)} page(s) written.")
+
+def write_generated(pages, content_dir, template_path, output_dir, basepath, manifest, site_index=None, listing_size=None, feeds=None, minify=False):
+    # Listings, sitemaps and the feed of an incremental build, all from one
+    # pass over the site index. Returns their output paths.
+    records = (site_index or SiteIndex(None)).pages(content_dir, [source_path for source_path, _ in pages])
+    listings = site_listings(records, pages, output_dir, listing_size) if listing_size else []
+    write_listings(listings, template_path, basepath, manifest, minify=minify)
+    outputs = [dest_path for _, dest_path in listings]
+    if feeds is not None:
+        for dest_path in feeds.write(output_dir, records, [listing.url for listing, _ in listings], basepath):
+            # recorded without sources, only so that stale ones get removed
+            manifest.record(dest_path, [], basepath, {"generated": True})
+            outputs.append(dest_path)
+    return outputs
+
+def remove_stale_generated(outputs, output_dir, manifest):
+    current = set(outputs)
+    for dest_path, entry in list(manifest.outputs.items()):
+        options = entry.get("options") or {}
+        if ("listing" in options or "generated" in options) and dest_path not in current:
+            print(f"Removing {dest_path}, it is no longer generated.")
+            remove_output(dest_path, output_dir)
+            manifest.remove(dest_path)
+
+def discover_files(source_dir, dest_dir, suffix=None, skip=()):
+    # Walks source_dir and yields (source, destination) path pairs in
+    # os.listdir order, depth first. File names in skip are left out.
+    for node in os.listdir(source_dir):
+        source_path = os.path.join(source_dir, node)
+        dest_path = os.path.join(dest_dir, node)
         if os.path.isfile(source_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(source_path, template_path, dest_path, basepath)
+            if node in skip:
+                continue
+            if suffix is not None:
+                dest_path = str(Path(dest_path).with_suffix(suffix))
+            yield source_path, dest_path
         else:
-            generate_pages_recursive(source_path, template_path, dest_path, basepath)
+            yield from discover_files(source_path, dest_path, suffix, skip)
+
+def discover_pages(content_dir, output_dir, template_path, site_index=None):
+    # (source, destination) pairs of the pages to build. With a site index,
+    # pages it excludes (drafts) are left out and its entries are kept in
+    # step with the pages on disk.
+    pages = list(discover_files(content_dir, output_dir, ".html", skip=(os.path.basename(template_path),)))
+    if site_index is None:
+        return pages
+    site_index.prune(source_path for source_path, _ in pages)
+    return [(source_path, dest_path) for source_path, dest_path in pages if not site_index.excludes(source_path)]
+
+def page_sources(source_path, template_path):
+    # Every file a page's output is built from: its markdown, the template it
+    # resolves to and that template's partials. Recorded in the manifest, this
+    # is the dependency graph incremental builds check.
+    template = resolve_template(source_path, template_path, read_front_matter(source_path).get("layout"))
+    return [source_path, template] + Template.from_file(template).dependencies
+
+_worker_block_cache = None
+_worker_asset_map = None
+
+def init_worker(block_cache, asset_map=None, profile_settings=None):
+    global _worker_block_cache, _worker_asset_map
+    _worker_block_cache = block_cache
+    _worker_asset_map = asset_map
+    if profile_settings is not None:
+        trace, origin = profile_settings
+        BuildProfiler(trace, origin).activate()
+
+def generate_page_batch(pages, template_path, basepath=None, block_cache=None, asset_map=None, minify=False, links=None, targets=None):
+    # Failures are returned instead of raised so one bad page doesn't hide the
+    # rest, and so the path travels with the error. With a links dict, the
+    # link URLs of each page are added to it: source -> (destination, urls).
+    # With OutputTargets, each page is written to every target.
+    failures = []
+    for source_path, dest_path in pages:
+        try:
+            page_targets = targets.dests(dest_path) if targets is not None else None
+            page_links = generate_page(source_path, template_path, dest_path, basepath, block_cache, asset_map, minify, page_targets)
+            if links is not None:
+                links[source_path] = (str(dest_path), page_links)
+        except Exception as e:
+            failures.append((source_path, f"{type(e).__name__}: {e}"))
+    return failures
+
+def generate_page_batch_in_worker(pages, template_path, basepath=None, minify=False, with_links=False, targets=None):
+    # Runs inside a worker process; hands the worker's block cache and profiler
+    # activity back so the parent can merge it.
+    links = {} if with_links else None
+    result = {"failures": generate_page_batch(pages, template_path, basepath, _worker_block_cache, _worker_asset_map, minify, links, targets)}
+    if links is not None:
+        result["links"] = links
+    if _worker_block_cache is not None:
+        result["block_cache"] = _worker_block_cache.take_changes()
+    if profiler.active() is not None:
+        result["profile"] = profiler.active().take_data()
+    return result
+
+def generate_pages(pages, template_path, basepath=None, jobs=1, block_cache=None, asset_map=None, minify=False, links=None, targets=None, started=None):
+    # Renders (source, destination) pairs, spreading them over a process pool
+    # when jobs > 1. Returns the source paths that failed to render.
+    # started() is called once rendering is under way and the workers are
+    # forked, so threads it starts are never running during a fork.
+    if jobs <= 1 or len(pages) <= 1:
+        if started is not None:
+            started()
+        failures = generate_page_batch(pages, template_path, basepath, block_cache, asset_map, minify, links, targets)
+    else:
+        batch_size = max(1, min(MAX_PAGE_BATCH, len(pages) // (jobs * 4)))
+        batches = [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+        failures = []
+        build_profiler = profiler.active()
+        profile_settings = (build_profiler.trace, build_profiler.origin) if build_profiler is not None else None
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(block_cache, asset_map, profile_settings)) as executor:
+            futures = [executor.submit(generate_page_batch_in_worker, batch, template_path, basepath, minify, links is not None, targets) for batch in batches]
+            if started is not None:
+                started()
+            for future in as_completed(futures):
+                result = future.result()
+                failures.extend(result["failures"])
+                if "links" in result:
+                    links.update(result["links"])
+                if "block_cache" in result:
+                    block_cache.merge_changes(result["block_cache"])
+                if "profile" in result:
+                    build_profiler.merge_data(result["profile"])
+
+    for source_path, error in failures:
+        print(f"Failed to generate page from {source_path}: {error}")
+    return {source_path for source_path, _ in failures}
+
+def manifest_path(output_dir):
+    return os.path.join(DIR_CACHE, f"manifest-{os.path.basename(os.path.normpath(output_dir))}.json")
+
+def forget_manifest(output_dir):
+    # Full builds rewrite outputs without recording them, so the manifest of
+    # an earlier --incremental build no longer describes the output directory.
+    path = manifest_path(output_dir)
+    if os.path.exists(path):
+        os.remove(path)
+
+def link_index_path(output_dir):
+    return os.path.join(DIR_CACHE, f"links-{os.path.basename(os.path.normpath(output_dir))}.json")
+
+def check_site_links(link_index, output_dir, asset_map=None):
+    # Checks the links of every page in the link index against the files in
+    # the output directory, plus the original names of fingerprinted assets.
+    with profiler.span("check_links"):
+        outputs = output_paths(output_dir)
+        if asset_map:
+            outputs.update(asset_map)
+        report = check_links(link_index, outputs, output_dir)
+    link_index.save()
+    print(report)
+    return report
+
+def compress_index_path(output_dir):
+    return os.path.join(DIR_CACHE, f"compressed-{os.path.basename(os.path.normpath(output_dir))}.json")
+
+def compress_site(output_dir, args):
+    with profiler.span("compress"):
+        stats = compress_outputs(output_dir, args.compress, args.compress_min_size, args.compress_workers, compress_index_path(output_dir))
+    print(f"Precompressed outputs ({', '.join(args.compress)}): {stats}.")
+
+def remove_output(dest_path, output_dir):
+    for path in [dest_path] + [f"{dest_path}{suffix}" for suffix in COMPRESSED_SUFFIXES.values()]:
+        if os.path.exists(path):
+            os.remove(path)
+
+    # prune directories left empty, stopping at the output root
+    directory = os.path.dirname(dest_path)
+    root = os.path.normpath(output_dir)
+    while os.path.normpath(directory) != root and os.path.isdir(directory) and os.listdir(directory) == []:
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+def copy_static_file(source_path, dest_path):
+    with profiler.span("copy_static"):
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        print(f"Copying {source_path} to {dest_path}.")
+        copy_file(source_path, dest_path)
+
+def build_incremental(static_dir, content_dir, template_path, output_dir, basepath=None, jobs=1, manifest=None, block_cache=None, minify=False, site_index=None, listing_size=None, feeds=None, link_index=None, save=True):
+    # save=False leaves saving the manifest to the caller, see BuildSession
+    if manifest is None:
+        manifest = BuildManifest.load(manifest_path(output_dir))
+    manifest.forget_hashes()
+    current_outputs = []
+    copied = rendered = unchanged = 0
+
+    if os.path.exists(static_dir):
+        for source_path, dest_path in discover_files(static_dir, output_dir):
+            current_outputs.append(dest_path)
+            if manifest.is_fresh(dest_path, [source_path]):
+                unchanged += 1
+                continue
+            copy_static_file(source_path, dest_path)
+            manifest.record(dest_path, [source_path])
+            copied += 1
+
+    pending = []
+    pages = discover_pages(content_dir, output_dir, template_path, site_index)
+    for source_path, dest_path in pages:
+        current_outputs.append(dest_path)
+        try:
+            sources = page_sources(source_path, template_path)
+        except (OSError, ValueError):
+            sources = None # rendering reports the error
+        # pages whose links were never collected are rendered again to collect them
+        if sources is not None and manifest.is_fresh(dest_path, sources, basepath, render_options(minify)) and (link_index is None or source_path in link_index):
+            unchanged += 1
+        else:
+            pending.append((source_path, dest_path))
+
+    page_links = {} if link_index is not None else None
+    failed = generate_pages(pending, template_path, basepath, jobs, block_cache, minify=minify, links=page_links)
+    for source_path, dest_path in pending:
+        if source_path in failed:
+            manifest.remove(dest_path)
+        else:
+            manifest.record(dest_path, page_sources(source_path, template_path), basepath, render_options(minify))
+            rendered += 1
+
+    if listing_size or feeds is not None:
+        current_outputs.extend(write_generated(pages, content_dir, template_path, output_dir, basepath, manifest, site_index, listing_size, feeds, minify))
+
+    stale = manifest.stale_outputs(current_outputs)
+    for dest_path in stale:
+        print(f"Removing {dest_path}, its source no longer exists.")
+        remove_output(dest_path, output_dir)
+        manifest.remove(dest_path)
+
+    manifest.prune_stats()
+    if save:
+        manifest.save()
+    print(f"Incremental build: {rendered} page(s) rendered, {copied} file(s) copied, {len(stale)} removed, {unchanged} unchanged.")
+    if link_index is not None:
+        link_index.update(page_links)
+        link_index.prune(source_path for source_path, _ in pages)
+        check_site_links(link_index, output_dir)
+    if failed:
+        raise Exception(f"{len(failed)} page(s) failed to generate")
+
+def rebuild_changed(changed, output_dir, basepath, manifest, block_cache=None, minify=False, site_index=None, listing_size=None, feeds=None, save=True):
+    # Rebuilds only the outputs affected by a set of changed source paths, using
+    # the manifest kept in memory by watch and serve mode.
+    start = time.perf_counter()
+    if any(is_template_source(path) for path in changed):
+        # the manifest knows which pages use which templates and partials,
+        # so only those pages are rendered again
+        build_incremental(DIR_STATIC, DIR_CONTENT, TEMPLATE_FILE, output_dir, basepath, manifest=manifest, block_cache=block_cache, minify=minify, site_index=site_index, listing_size=listing_size, feeds=feeds, save=save)
+        print(f"Template changed, rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return
+
+    manifest.forget_hashes(changed)
+    for source_path in sorted(changed):
+        if is_within(source_path, DIR_CONTENT):
+            relative_path = os.path.relpath(source_path, DIR_CONTENT)
+            dest_path = str(Path(output_dir, relative_path).with_suffix(".html"))
+            # a page that became a draft is removed like a deleted one
+            if os.path.isfile(source_path) and not (site_index is not None and site_index.excludes(source_path)):
+                failed = generate_pages([(source_path, dest_path)], TEMPLATE_FILE, basepath, block_cache=block_cache, minify=minify)
+                if failed:
+                    manifest.remove(dest_path)
+                else:
+                    manifest.record(dest_path, page_sources(source_path, TEMPLATE_FILE), basepath, render_options(minify))
+                continue
+        elif is_within(source_path, DIR_STATIC):
+            dest_path = os.path.join(output_dir, os.path.relpath(source_path, DIR_STATIC))
+            if os.path.isfile(source_path):
+                copy_static_file(source_path, dest_path)
+                manifest.record(dest_path, [source_path])
+                continue
+        else:
+            continue
+
+        print(f"Removing {dest_path}, its source no longer exists.")
+        remove_output(dest_path, output_dir)
+        manifest.remove(dest_path)
+
+    if (listing_size or feeds is not None) and any(is_within(path, DIR_CONTENT) for path in changed):
+        # the site index only re-reads the changed pages, and only listings
+        # whose posts changed are rewritten
+        pages = discover_pages(DIR_CONTENT, output_dir, TEMPLATE_FILE, site_index)
+        outputs = write_generated(pages, DIR_CONTENT, TEMPLATE_FILE, output_dir, basepath, manifest, site_index, listing_size, feeds, minify)
+        remove_stale_generated(outputs, output_dir, manifest)
+
+    manifest.prune_stats()
+    if save:
+        manifest.save()
+    print(f"Rebuilt {len(changed)} changed file(s) in {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+def render_options(minify):
+    # settings besides the template and basepath that change a page's output,
+    # recorded in the manifest so toggling them rebuilds every page
+    return {"minify": True} if minify else None
+
+def is_template_source(path):
+    # templates, layouts and partials, as opposed to pages and static files
+    if is_within(path, DIR_CONTENT):
+        return os.path.basename(path) == os.path.basename(TEMPLATE_FILE)
+    return not is_within(path, DIR_STATIC)
+
+def is_within(path, directory):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)
+
+WATCHED_PATHS = [DIR_CONTENT, DIR_STATIC, TEMPLATE_FILE, DIR_LAYOUTS, DIR_PARTIALS] # the sources of watch and serve mode
+
+def watch_site(output_dir, basepath, port=DEV_SERVER_PORT, interval=0.25, block_cache=None, minify=False, site_index=None, listing_size=None, feeds=None):
+    # Builds once, serves output_dir in-process and rebuilds affected pages
+    # whenever something under content/, static/ or the template changes.
+    manifest = BuildManifest.load(manifest_path(output_dir))
+    build_incremental(DIR_STATIC, DIR_CONTENT, TEMPLATE_FILE, output_dir, basepath, manifest=manifest, block_cache=block_cache, minify=minify, site_index=site_index, listing_size=listing_size, feeds=feeds)
+    if site_index is not None:
+        site_index.save()
+
+    live_reload = LiveReload()
+    server = serve(output_dir, port, basepath, live_reload)
+    print(f"Serving '{output_dir}' at http://localhost:{port}{basepath} and watching for changes. Press Ctrl+C to stop.")
+
+    def on_change(changed):
+        try:
+            rebuild_changed(changed, output_dir, basepath, manifest, block_cache, minify, site_index, listing_size, feeds)
+            if site_index is not None:
+                site_index.save()
+        except Exception as e:
+            print(f"Rebuild failed: {e}")
+        live_reload.bump()
+
+    try:
+        watch(WATCHED_PATHS, on_change, interval)
+    except KeyboardInterrupt:
+        print("Stopping.")
+    finally:
+        server.shutdown()
+
+class BuildSession():
+    # The warm state of serve mode, kept between build requests: the output
+    # manifest, the site index, rendered blocks, parsed templates (cached by
+    # Template.from_file) and a snapshot of the sources as of the last build.
+    # A build request only stats the watched files and renders what changed;
+    # the state is saved by save(), which serve_site calls once the response
+    # is sent, so writing it out doesn't delay the answer.
+    def __init__(self, output_dir, basepath, jobs=1, block_cache=None, minify=False, site_index=None, listing_size=None, feeds=None):
+        self.output_dir = output_dir
+        self.basepath = basepath
+        self.jobs = jobs
+        self.manifest = BuildManifest.load(manifest_path(output_dir))
+        # rendered blocks are kept in memory even without --block-cache
+        self.block_cache = block_cache if block_cache is not None else BlockCache()
+        self.minify = minify
+        self.site_index = site_index
+        self.listing_size = listing_size
+        self.feeds = feeds
+        self.state = {}
+        self.builds = 0
+        self.started = time.time()
+        self.unsaved = False
+
+    def handle(self, request):
+        command = request.get("command", "build")
+        if command == "build":
+            return self.build(request.get("paths"))
+        if command == "rebuild":
+            return self.rebuild()
+        if command == "status":
+            return {"outputs": len(self.manifest.outputs), "sources": len(self.state), "builds": self.builds,
+                    "uptime": round(time.time() - self.started, 1)}
+        raise ValueError(f"Unknown command '{command}', expected build, rebuild, status or shutdown")
+
+    def rebuild(self):
+        # Checks every source against the manifest, like an --incremental
+        # build; also restores outputs that were changed or deleted by hand.
+        self.state = snapshot(WATCHED_PATHS)
+        build_incremental(DIR_STATIC, DIR_CONTENT, TEMPLATE_FILE, self.output_dir, self.basepath, self.jobs, self.manifest, self.block_cache,
+                          self.minify, self.site_index, self.listing_size, self.feeds, save=False)
+        self.unsaved = True
+        self.builds += 1
+        return {"sources": len(self.state)}
+
+    def save(self):
+        if not self.unsaved:
+            return
+        self.manifest.save()
+        if self.site_index is not None:
+            self.site_index.save()
+        self.unsaved = False
+
+    def build(self, paths=None):
+        # Rebuilds what changed since the last build. Clients that know what
+        # they changed (e.g. an editor on save) pass paths, which skips
+        # walking the watched directories.
+        if paths is None:
+            new_state = snapshot(WATCHED_PATHS)
+            changed = changed_paths(self.state, new_state)
+            self.state = new_state
+        else:
+            changed = {os.path.relpath(path) for path in paths}
+            for path in changed:
+                self.state.pop(path, None)
+                self.state.update(snapshot([path]))
+        if changed:
+            rebuild_changed(changed, self.output_dir, self.basepath, self.manifest, self.block_cache, self.minify, self.site_index, self.listing_size, self.feeds, save=False)
+            self.unsaved = True
+        self.builds += 1
+        return {"changed": sorted(changed)}
+
+def serve_site(output_dir, basepath, socket_path=None, jobs=1, block_cache=None, minify=False, site_index=None, listing_size=None, feeds=None):
+    # Serves build requests (see daemon.py) from stdin, or from a Unix
+    # socket at socket_path, after bringing the output up to date once.
+    session = BuildSession(output_dir, basepath, jobs, block_cache, minify, site_index, listing_size, feeds)
+    if socket_path is None:
+        # stdout carries the protocol, so the first build is answered like a
+        # request; clients can wait for that line before sending theirs
+        try:
+            serve_stream(session.handle, sys.stdin, sys.__stdout__, {"command": "rebuild", "id": "start"}, session.save)
+        finally:
+            session.save()
+        return
+
+    session.rebuild()
+    try:
+        serve_socket(socket_path, session.handle, lambda server: print(f"Serving build requests for '{output_dir}' on {socket_path}. Press Ctrl+C to stop."), session.save)
+    except KeyboardInterrupt:
+        print("Stopping.")
+    finally:
+        session.save()
+
+def parse_args(argv):
+    command = "build"
+    if argv and argv[0] in ("watch", "serve"):
+        command, argv = argv[0], argv[1:]
+
+    parser = argparse.ArgumentParser(description="Build the static site. Use 'watch' as the first argument to serve it and rebuild on changes, "
+                                                 "or 'serve' to keep a build server running that rebuilds on request.")
+    parser.add_argument("deployment", nargs="?", help="'local' (outputs to public/) or 'github' (outputs to docs/)")
+    parser.add_argument("basepath", nargs="?", help="prefix for root-relative href/src links, defaults to '/'")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only rebuild outputs whose sources, template or basepath changed since the last build (state kept in {DIR_CACHE}/)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="render pages over N worker processes, 0 uses every CPU (default: 1)")
+    parser.add_argument("--sync", action="store_true",
+                        help="update the output directory in place, copying only changed static files, instead of recreating it")
+    parser.add_argument("--sync-compare", choices=["mtime", "hash"], default="mtime",
+                        help="how --sync detects changed files: size and mtime, or content hash (default: mtime)")
+    parser.add_argument("--hardlink", action="store_true",
+                        help="with --sync, hardlink static files into the output instead of copying when possible")
+    parser.add_argument("--copy-threads", type=int, default=1, metavar="N",
+                        help="copy static files over N threads, in the background while pages render (default: 1)")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help=f"emit static files as name.<hash>.ext, point page links at them and write {ASSET_MANIFEST_FILE} (full builds only)")
+    parser.add_argument("--target", dest="targets", action="append", default=[], metavar="DIR[:BASEPATH]",
+                        help="also write the site to DIR with its own basepath (default: '/'), rendering each page only once; repeatable (full builds only)")
+    parser.add_argument("--drafts", action="store_true",
+                        help="also build pages whose front matter has draft: true")
+    parser.add_argument("--listings", action="store_true",
+                        help="generate paginated blog index, tag and archive pages for content/blog")
+    parser.add_argument("--listing-size", type=int, default=DEFAULT_PAGE_SIZE, metavar="N",
+                        help=f"posts per listing page (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--site-url", metavar="URL",
+                        help="public URL of the site, e.g. https://example.com, used by --sitemap and --feed")
+    parser.add_argument("--sitemap", action="store_true",
+                        help="write sitemap.xml, split into a sitemap index above 50,000 URLs")
+    parser.add_argument("--feed", action="store_true",
+                        help="write an Atom feed of the newest posts in content/blog to blog/feed.xml")
+    parser.add_argument("--check-links", action="store_true",
+                        help="report links and images in pages that point at files the build didn't produce")
+    parser.add_argument("--minify", action="store_true",
+                        help="minify generated pages: drop comments, optional attribute quotes and whitespace between tags (pre/code untouched)")
+    parser.add_argument("--compress", metavar="FORMATS",
+                        help=f"write precompressed siblings of {'/'.join(sorted(COMPRESSIBLE_EXTENSIONS))} outputs, comma separated from: {', '.join(COMPRESSED_SUFFIXES)} "
+                             "(br needs the brotli package, zstd the zstandard package)")
+    parser.add_argument("--compress-min-size", type=int, default=DEFAULT_MIN_SIZE, metavar="BYTES",
+                        help=f"skip outputs smaller than this when compressing (default: {DEFAULT_MIN_SIZE})")
+    parser.add_argument("--compress-workers", type=int, default=0, metavar="N",
+                        help="compress over N threads, 0 uses every CPU (default: 0)")
+    parser.add_argument("--block-cache", action="store_true",
+                        help=f"reuse rendered HTML for markdown blocks seen before, persisted in {BLOCK_CACHE_FILE}")
+    parser.add_argument("--block-cache-size", type=int, default=DEFAULT_MAX_ENTRIES, metavar="N",
+                        help=f"maximum number of cached blocks, least recently used are evicted first (default: {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every build phase and page and print a report at the end")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="number of slowest pages listed by --profile (default: 10)")
+    parser.add_argument("--profile-trace", metavar="FILE",
+                        help="with --profile, also write a Chrome trace-event JSON file")
+    parser.add_argument("--profile-pstats", metavar="FILE",
+                        help="run the build under cProfile and dump pstats to FILE (main process only)")
+    parser.add_argument("--port", type=int, default=DEV_SERVER_PORT, help=f"watch mode: port to serve on (default: {DEV_SERVER_PORT})")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="serve mode: take requests on a Unix socket at PATH instead of stdin")
+    parser.add_argument("--interval", type=float, default=0.25, help="watch mode: seconds between change polls (default: 0.25)")
+    args = parser.parse_args(argv)
+    args.command = command
+    long_running = command in ("watch", "serve")
+    if args.fingerprint and (args.incremental or long_running):
+        parser.error("--fingerprint is only supported for full builds")
+    if args.targets and (args.incremental or long_running):
+        parser.error("--target is only supported for full builds")
+    args.targets = [parse_target(target) for target in args.targets]
+    if args.compress is not None:
+        args.compress = [format.strip() for format in args.compress.split(",") if format.strip()]
+        for format in args.compress:
+            if format not in COMPRESSED_SUFFIXES:
+                parser.error(f"unknown --compress format '{format}', choose from: {', '.join(COMPRESSED_SUFFIXES)}")
+            if format not in available_formats():
+                parser.error(f"--compress {format} needs a package that isn't installed")
+        if long_running:
+            parser.error(f"--compress is only supported for builds, not {command} mode")
+    if args.hardlink and not args.sync:
+        # a hardlinked output shares its data with the file in static/
+        parser.error("--hardlink is only supported with --sync")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    if args.check_links and long_running:
+        parser.error(f"--check-links is only supported for builds, not {command} mode")
+    if args.socket is not None and command != "serve":
+        parser.error("--socket is only supported in serve mode")
+    if args.socket is not None and not hasattr(socket, "AF_UNIX"):
+        parser.error("--socket needs Unix domain sockets, which this platform doesn't have")
+    if (args.sitemap or args.feed) and not args.site_url:
+        parser.error("--sitemap and --feed need --site-url")
+    if args.listing_size < 1:
+        parser.error("--listing-size must be a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+def parse_target(value):
+    directory, _, basepath = value.partition(":")
+    return directory, basepath or "/"
 
 def main():
-    # Usage: python3 src/main.py [local|github] [basepath]
+    # Usage: python3 src/main.py [watch|serve] [local|github] [basepath] [--incremental] [--jobs N]
+    args = parse_args(sys.argv[1:])
+    if args.command == "serve" and args.socket is None:
+        # stdout carries the serve protocol (see serve_site), everything else goes to stderr
+        sys.stdout = sys.stderr
     output_dir = DIR_PUBLIC  # Default to local deployment
     basepath = "/"
 
-    if len(sys.argv) > 1:
-        arg = sys.argv[1].lower()
+    if args.deployment is not None:
+        arg = args.deployment.lower()
         if arg == "github":
             output_dir = DIR_DOCS
             print("Deploying for Github.")
@@ -88,14 +774,137 @@ def main():
     else:
         print("No deployment type specified. Defaulting to local deployment (outputs to 'public').")
 
-    if len(sys.argv) > 2:
-        basepath = sys.argv[2]
+    if args.basepath is not None:
+        basepath = args.basepath
         print(f"Using '{basepath}' as the basepath.")
     else:
         print("No basepath specified, defaulting to '/' for the path.")
 
-    prepare_directory(DIR_STATIC, output_dir)
-    generate_pages_recursive(DIR_CONTENT, TEMPLATE_FILE, output_dir, basepath)
+    block_cache = None
+    if args.block_cache:
+        block_cache = BlockCache.load(BLOCK_CACHE_FILE, args.block_cache_size)
+
+    site_index = SiteIndex.load(SITE_INDEX_FILE, args.drafts)
+
+    build_profiler = None
+    if args.profile:
+        build_profiler = BuildProfiler(trace=args.profile_trace is not None)
+        build_profiler.activate()
+
+    try:
+        with profiler.cprofile_to(args.profile_pstats):
+            build(args, output_dir, basepath, block_cache, site_index)
+    finally:
+        site_index.save()
+        if block_cache is not None:
+            block_cache.save(BLOCK_CACHE_FILE)
+            print(block_cache.report())
+        if build_profiler is not None:
+            build_profiler.deactivate()
+            print(build_profiler.report(args.profile_top))
+            if args.profile_trace:
+                build_profiler.write_trace(args.profile_trace)
+                print(f"Trace written to {args.profile_trace}.")
+
+def build(args, output_dir, basepath, block_cache=None, site_index=None):
+    listing_size = args.listing_size if args.listings else None
+    feeds = SiteFeeds(args.site_url, args.sitemap, args.feed) if (args.sitemap or args.feed) else None
+    link_index = LinkIndex.load(link_index_path(output_dir)) if args.check_links else None
+    if args.command == "serve":
+        serve_site(output_dir, basepath, args.socket, args.jobs, block_cache, args.minify, site_index, listing_size, feeds)
+        return
+    if args.command == "watch":
+        watch_site(output_dir, basepath, args.port, args.interval, block_cache, args.minify, site_index, listing_size, feeds)
+        return
+
+    if args.incremental:
+        build_incremental(DIR_STATIC, DIR_CONTENT, TEMPLATE_FILE, output_dir, basepath, args.jobs, block_cache=block_cache, minify=args.minify, site_index=site_index, listing_size=listing_size, feeds=feeds, link_index=link_index)
+        if args.compress:
+            compress_site(output_dir, args)
+        return
+
+    with profiler.span("site_index"):
+        pages = discover_pages(DIR_CONTENT, output_dir, TEMPLATE_FILE, site_index)
+        # listings, the sitemap and the feed all come from the same records
+        records = site_index.pages(DIR_CONTENT, [source_path for source_path, _ in pages]) if (listing_size or feeds) else []
+        listings = site_listings(records, pages, output_dir, listing_size) if listing_size else []
+    listing_urls = [listing.url for listing, _ in listings]
+    keep = [dest for _, dest in pages] + [dest for _, dest in listings]
+    if feeds is not None:
+        keep.extend(os.path.join(output_dir, name) for name in feeds.outputs(records, listing_urls))
+    asset_map = None
+    if args.fingerprint:
+        hash_index = AssetHashIndex.load(ASSET_HASH_INDEX_FILE)
+        with profiler.span("fingerprint"):
+            asset_map = build_asset_map(DIR_STATIC, hash_index)
+        hash_index.save()
+        keep.append(os.path.join(output_dir, ASSET_MANIFEST_FILE))
+
+    # every --target gets the same static files and pages as output_dir, with its own basepath
+    targets = OutputTargets([(output_dir, basepath)] + args.targets)
+    page_targets = targets if len(targets) > 1 else None
+    for target_dir, _ in targets:
+        forget_manifest(target_dir)
+
+    plans = []
+    for target_dir, _ in targets:
+        if args.sync or args.copy_threads > 1 or args.fingerprint:
+            with profiler.span("copy_static"):
+                if not args.sync:
+                    recreate_directory(target_dir)
+                sibling_suffixes = [COMPRESSED_SUFFIXES[format] for format in args.compress or ()]
+                rename = None
+                if asset_map is not None:
+                    rename = lambda dest_path, target_dir=target_dir: fingerprinted_dest(dest_path, target_dir, asset_map)
+                target_keep = [targets.move(path, target_dir) for path in keep]
+                plan = plan_sync(DIR_STATIC, target_dir, args.sync_compare, target_keep, rename, sibling_suffixes)
+                if asset_map is not None:
+                    print(f"Fingerprinted {len(asset_map)} asset(s), manifest written to {write_asset_manifest(target_dir, asset_map)}.")
+            plans.append((target_dir, plan))
+        else:
+            with profiler.span("copy_static"):
+                prepare_directory(DIR_STATIC, target_dir)
+
+    # the copy runs in the background while pages render; they never touch the
+    # same files. It starts once the render workers are forked, as forking
+    # while copy threads hold locks can deadlock the workers.
+    copy_job = ThreadPoolExecutor(max_workers=1) if plans else None
+    copies = []
+    def start_copies():
+        for target_dir, plan in plans:
+            copies.append((target_dir, copy_job.submit(copy_files, plan, args.hardlink, args.copy_threads)))
+
+    try:
+        # drafts are already filtered out of pages, so serial builds go through
+        # generate_pages too rather than walking content/ again
+        page_links = {} if link_index is not None else None
+        failed = generate_pages(pages, TEMPLATE_FILE, basepath, args.jobs, block_cache, asset_map, args.minify, page_links, page_targets, start_copies)
+        if failed:
+            raise Exception(f"{len(failed)} page(s) failed to generate")
+        if listings:
+            write_listings(listings, TEMPLATE_FILE, basepath, asset_map=asset_map, minify=args.minify, targets=page_targets)
+        if feeds is not None:
+            with profiler.span("feeds"):
+                for target_dir, target_basepath in targets:
+                    feeds.write(target_dir, records, listing_urls, target_basepath)
+    finally:
+        if copy_job is not None:
+            copy_job.shutdown()
+    for target_dir, copy_stats in copies:
+        print(f"Static files from '{DIR_STATIC}' to '{target_dir}': {copy_stats.result()}.")
+    if link_index is not None:
+        # the targets only differ in their basepath, so checking one covers them all
+        link_index.update(page_links)
+        link_index.prune(source_path for source_path, _ in pages)
+        check_site_links(link_index, output_dir, asset_map)
+    if args.compress:
+        for target_dir, _ in targets:
+            compress_site(target_dir, args)
+
+def recreate_directory(directory):
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
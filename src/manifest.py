@@ -0,0 +1,92 @@
+import hashlib, os
+
+from state import load_state, save_state
+
+
+MANIFEST_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class BuildManifest():
+    # Maps every output file to the inputs it was produced from, so a later
+    # build can tell which outputs are still up to date:
+    #   dest -> {"sources": {path: sha256}, "basepath": str, "options": dict}
+    # A page's sources include its template and partials.
+    # Source stats are kept alongside so unchanged files aren't re-hashed.
+    def __init__(self, path, outputs=None, stats=None):
+        self.path = path
+        self.outputs = outputs if outputs is not None else {}
+        self.stats = stats if stats is not None else {}
+        self._hashes = {}
+
+    @classmethod
+    def load(cls, path):
+        data = load_state(path, MANIFEST_VERSION)
+        return cls(path, data.get("outputs", {}), data.get("stats", {}))
+
+    def save(self):
+        save_state(self.path, MANIFEST_VERSION, {"outputs": self.outputs, "stats": self.stats})
+
+    def hash_source(self, path):
+        path = str(path)
+        if path in self._hashes:
+            return self._hashes[path]
+
+        stat = os.stat(path)
+        cached = self.stats.get(path)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            digest = cached["sha256"]
+        else:
+            digest = hash_file(path)
+            self.stats[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+
+        self._hashes[path] = digest
+        return digest
+
+    def forget_hashes(self, paths=None):
+        # Hashes are memoized per build; long-running processes call this once
+        # sources may have changed on disk (the stat cache still applies).
+        if paths is None:
+            self._hashes = {}
+        else:
+            for path in paths:
+                self._hashes.pop(str(path), None)
+
+    def is_fresh(self, dest, sources, basepath=None, options=None):
+        entry = self.outputs.get(str(dest))
+        if entry is None or not os.path.exists(dest):
+            return False
+        if entry.get("basepath") != basepath or entry.get("options") != options:
+            return False
+        if set(entry["sources"]) != {str(source) for source in sources}:
+            return False
+        for source in sources:
+            if entry["sources"][str(source)] != self.hash_source(source):
+                return False
+        return True
+
+    def record(self, dest, sources, basepath=None, options=None):
+        self.outputs[str(dest)] = {
+            "sources": {str(source): self.hash_source(source) for source in sources},
+            "basepath": basepath,
+            "options": options,
+        }
+
+    def remove(self, dest):
+        self.outputs.pop(str(dest), None)
+
+    def prune_stats(self):
+        referenced = set()
+        for entry in self.outputs.values():
+            referenced.update(entry["sources"])
+        self.stats = {path: stat for path, stat in self.stats.items() if path in referenced}
+
+    def stale_outputs(self, current_outputs):
+        current = {str(dest) for dest in current_outputs}
+        return [dest for dest in self.outputs if dest not in current]
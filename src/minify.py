@@ -0,0 +1,138 @@
+import re
+
+from io import StringIO
+
+
+# Whitespace next to these tags never renders, so it can be dropped entirely;
+# between any other tags or text it is collapsed to a single space.
+BLOCK_TAGS = {
+    "!doctype", "address", "article", "aside", "blockquote", "body", "br", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header",
+    "hr", "html", "li", "link", "main", "meta", "nav", "ol", "p", "pre", "section", "summary", "table", "tbody",
+    "td", "tfoot", "th", "thead", "title", "tr", "ul",
+}
+# Content of these elements is copied through untouched.
+RAW_TAGS = ("pre", "code", "textarea", "script", "style")
+
+BLOCK_TAG_NAMES = "|".join(re.escape(name) for name in sorted(BLOCK_TAGS, key=len, reverse=True))
+
+# comments (possibly cut off by the end of the buffer) and raw element start tags
+SPECIAL_REGEX_PATTERN = re.compile(rf"<!--(?:.*?-->|.*)|<({'|'.join(RAW_TAGS)})\b[^>]*>", re.DOTALL)
+# runs that collapse to one space: two or more whitespace characters, or a tab/newline
+WHITESPACE_REGEX_PATTERN = re.compile(r"\s\s+|[^\S ]")
+SPACE_AFTER_BLOCK_REGEX_PATTERN = re.compile(rf"(</?(?:{BLOCK_TAG_NAMES})(?=[\s/>])[^>]*>) ")
+SPACE_BEFORE_BLOCK_REGEX_PATTERN = re.compile(rf" (?=</?(?:{BLOCK_TAG_NAMES})[\s/>])")
+QUOTED_TAG_REGEX_PATTERN = re.compile(r'<[A-Za-z][^<>=]*="[^>]*>')
+# an attribute value that stays a single token without quotes; the closing
+# quote must be followed by whitespace or '>', since in <img src="a"/> or
+# class="x"href=... the next character would become part of the value
+QUOTED_VALUE_REGEX_PATTERN = re.compile(r"""(\s[^\s"'=<>/]+)="([^\s"'=<>`]+)"(?=[\s>])""")
+FEED_SIZE = 64 * 1024
+
+def unquote_attributes(tag):
+    return QUOTED_VALUE_REGEX_PATTERN.sub(r"\1=\2", tag)
+
+def minify_text(html):
+    # Minifies HTML that has no comments or raw elements in it. Every pass is
+    # a single compiled-regex substitution, so the scan itself runs in C.
+    html = WHITESPACE_REGEX_PATTERN.sub(" ", html)
+    html = SPACE_AFTER_BLOCK_REGEX_PATTERN.sub(r"\1", html)
+    html = SPACE_BEFORE_BLOCK_REGEX_PATTERN.sub("", html)
+    return QUOTED_TAG_REGEX_PATTERN.sub(lambda match: unquote_attributes(match.group()), html)
+
+class HtmlMinifier():
+    # A write-only stream that minifies HTML on its way to another stream:
+    # comments are dropped, whitespace between tags is collapsed (or removed
+    # next to block-level tags) and attribute quotes are dropped where they
+    # are optional. Small writes are gathered into FEED_SIZE pieces and each
+    # piece is minified between comments and raw elements by minify_text.
+    # Pieces are cut just before a tag that directly follows text or another
+    # tag, so no whitespace run or tag is ever split between two pieces.
+    def __init__(self, stream):
+        self.stream = stream
+        self._buffer = ""
+        self._pending = []
+        self._pending_size = 0
+        self._raw_end = None # closing tag prefix while inside a raw element
+        self._started = False
+
+    def write(self, text):
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= FEED_SIZE:
+            self._feed(False)
+        return len(text)
+
+    def close(self):
+        # Flushes whatever is left; call once after the last write.
+        self._feed(True)
+
+    def _feed(self, final):
+        self._buffer += "".join(self._pending)
+        self._pending, self._pending_size = [], 0
+        self._scan(final)
+
+    def _scan(self, final):
+        buffer, pos = self._buffer, 0
+        while pos < len(buffer):
+            if self._raw_end is not None:
+                end = buffer.find(self._raw_end, pos)
+                if end == -1:
+                    # keep back a tail that could be the start of the closing tag
+                    end = len(buffer) if final else max(pos, len(buffer) - len(self._raw_end) + 1)
+                    self.stream.write(buffer[pos:end])
+                    pos = end
+                    break
+                self.stream.write(buffer[pos:end])
+                pos = end
+                self._raw_end = None
+
+            limit = len(buffer) if final else self._cut(buffer, pos)
+            if limit <= pos:
+                break
+
+            special = SPECIAL_REGEX_PATTERN.search(buffer, pos, limit)
+            if special is None:
+                self._emit(buffer[pos:limit])
+                pos = limit
+                break
+
+            tag = special.group()
+            if tag.startswith("<!--"):
+                if not tag.endswith("-->") and not final:
+                    # unterminated so far; wait for the rest of the comment
+                    self._emit(buffer[pos:special.start()])
+                    pos = special.start()
+                    break
+                self._emit(buffer[pos:special.start()])
+                if tag.startswith("<!--[if") or tag.startswith("<!--<![endif]"):
+                    self.stream.write(tag)
+            else:
+                # the start tag goes through minify_text too, for the whitespace before it
+                self._emit(buffer[pos:special.end()])
+                if not tag.endswith("/>"):
+                    self._raw_end = f"</{special.group(1)}"
+            pos = special.end()
+
+        self._buffer = buffer[pos:]
+
+    def _cut(self, buffer, pos):
+        # the last '<' not preceded by whitespace; everything before it is safe to minify
+        cut = buffer.rfind("<", pos)
+        while cut > pos and buffer[cut - 1].isspace():
+            cut = buffer.rfind("<", pos, cut)
+        return cut
+
+    def _emit(self, html):
+        html = minify_text(html)
+        if not self._started:
+            html = html.lstrip()
+            self._started = bool(html)
+        self.stream.write(html)
+
+def minify_html(html):
+    output = StringIO()
+    minifier = HtmlMinifier(output)
+    minifier.write(html)
+    minifier.close()
+    return output.getvalue()
@@ -0,0 +1,159 @@
+import os, json, time
+import cProfile
+
+from contextlib import contextmanager, nullcontext
+
+
+MAX_TRACE_EVENTS = 2000000
+_active = None
+_null_span = nullcontext()
+
+def span(name):
+    # Times a phase of the build when profiling is on, otherwise does nothing.
+    if _active is None:
+        return _null_span
+    return _active.phase(name)
+
+def page(path):
+    if _active is None:
+        return _null_span
+    return _active.page(path)
+
+def active():
+    return _active
+
+class BuildProfiler():
+    # Records wall time and call counts per build phase and per page. Phases
+    # nest; each phase's self time excludes the phases running inside it, so
+    # the self times add up to the profiled total.
+    def __init__(self, trace=False, origin=None):
+        self.trace = trace
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = {} # name -> [calls, self seconds]
+        self.pages = {} # source path -> seconds
+        self.events = []
+        self._stack = []
+        self._patched = []
+
+    def begin(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def end(self):
+        name, start, child_seconds = self._stack.pop()
+        end = time.perf_counter()
+        elapsed = end - start
+
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed - child_seconds
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+        if self.trace and len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                "ts": round((start - self.origin) * 1e6, 3), "dur": round(elapsed * 1e6, 3),
+            })
+        return elapsed
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    @contextmanager
+    def page(self, path):
+        self.begin("other")
+        try:
+            yield
+        finally:
+            self.pages[str(path)] = self.end()
+
+    def instrument(self, module, attribute, name):
+        # Replaces module.attribute with a timed wrapper until restore().
+        func = getattr(module, attribute)
+
+        def timed(*args, **kwargs):
+            self.begin(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.end()
+
+        setattr(module, attribute, timed)
+        self._patched.append((module, attribute, func))
+
+    def activate(self):
+        global _active
+        import block_markdown
+        if _active is not None:
+            # e.g. the parent's profiler in a forked worker: its wrappers
+            # would time every call a second time, into a copy never returned
+            _active.deactivate()
+        self.instrument(block_markdown, "text_to_textnodes", "text_to_textnodes")
+        self.instrument(block_markdown, "block_to_html_node", "block_to_html_node")
+        _active = self
+
+    def deactivate(self):
+        global _active
+        for module, attribute, func in reversed(self._patched):
+            setattr(module, attribute, func)
+        self._patched = []
+        _active = None
+
+    def take_data(self):
+        # Everything recorded so far, for a worker process to hand to the parent.
+        data = {"phases": self.phases, "pages": self.pages, "events": self.events}
+        self.phases, self.pages, self.events = {}, {}, []
+        return data
+
+    def merge_data(self, data):
+        for name, (calls, seconds) in data["phases"].items():
+            stats = self.phases.setdefault(name, [0, 0.0])
+            stats[0] += calls
+            stats[1] += seconds
+        self.pages.update(data["pages"])
+        room = MAX_TRACE_EVENTS - len(self.events)
+        self.events.extend(data["events"][:max(room, 0)])
+
+    def report(self, top=10):
+        lines = []
+        total = sum(seconds for _, seconds in self.phases.values())
+        lines.append(f"Phase breakdown ({total:.3f}s profiled):")
+        lines.append(f"  {'phase':<20} {'calls':>9} {'seconds':>9} {'share':>7}")
+        for name, (calls, seconds) in sorted(self.phases.items(), key=lambda item: item[1][1], reverse=True):
+            share = seconds / total if total else 0.0
+            lines.append(f"  {name:<20} {calls:>9} {seconds:>9.3f} {share:>7.1%}")
+
+        slowest = sorted(self.pages.items(), key=lambda item: item[1], reverse=True)[:top]
+        lines.append(f"Slowest {len(slowest)} of {len(self.pages)} page(s):")
+        for path, seconds in slowest:
+            lines.append(f"  {seconds * 1000:>9.2f} ms  {path}")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        # Chrome trace-event format, loadable in chrome://tracing or Perfetto.
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+        if len(self.events) >= MAX_TRACE_EVENTS:
+            print(f"Trace truncated to the first {MAX_TRACE_EVENTS} events.")
+
+@contextmanager
+def cprofile_to(path):
+    # Runs the enclosed code under cProfile and dumps pstats to path.
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        print(f"cProfile stats written to {path}.")
@@ -0,0 +1,83 @@
+import os
+
+from front_matter import read_page_header
+from state import load_state, save_state
+
+
+SITE_INDEX_VERSION = 2
+
+def page_url(source_path, content_dir):
+    # content/blog/tom/index.md -> /blog/tom/, content/about.md -> /about.html
+    relative_path = os.path.relpath(source_path, content_dir).replace(os.sep, "/")
+    root, _ = os.path.splitext(relative_path)
+    if root == "index":
+        return "/"
+    if root.endswith("/index"):
+        return f"/{root[:-len('index')]}"
+    return f"/{root}.html"
+
+class SiteIndex():
+    # Metadata (front matter and title) of every page, read from each file's
+    # header without rendering its body, and kept on disk between builds:
+    #   source path -> {"mtime_ns": int, "size": int, "meta": dict}
+    # A page is only re-read when its size or mtime changes.
+    def __init__(self, path, entries=None, include_drafts=False):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.include_drafts = include_drafts
+        self._changed = False
+
+    @classmethod
+    def load(cls, path, include_drafts=False):
+        return cls(path, load_state(path, SITE_INDEX_VERSION).get("entries", {}), include_drafts)
+
+    def save(self):
+        if not self._changed:
+            return
+        save_state(self.path, SITE_INDEX_VERSION, {"entries": self.entries})
+        self._changed = False
+
+    def metadata(self, source_path, stat=None):
+        # Raises ValueError for invalid front matter; such pages aren't cached.
+        source_path = str(source_path)
+        if stat is None:
+            stat = os.stat(source_path)
+        cached = self.entries.get(source_path)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["meta"]
+        meta = read_page_header(source_path)
+        self.entries[source_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "meta": meta}
+        self._changed = True
+        return meta
+
+    def excludes(self, source_path):
+        # Draft pages are left out of the build unless drafts are included.
+        if self.include_drafts:
+            return False
+        try:
+            return self.metadata(source_path).get("draft", False)
+        except (OSError, ValueError):
+            return False # let the build report the error
+
+    def pages(self, content_dir, sources):
+        # Index records for the given page sources, skipping excluded drafts
+        # and pages whose front matter is invalid.
+        records = []
+        for source_path in sources:
+            source_path = str(source_path)
+            try:
+                meta = self.metadata(source_path)
+            except (OSError, ValueError) as e:
+                print(f"Leaving {source_path} out of the site index: {e}")
+                continue
+            if meta.get("draft") and not self.include_drafts:
+                continue
+            records.append(dict(meta, source=source_path, url=page_url(source_path, content_dir)))
+        return records
+
+    def prune(self, sources):
+        # Drops entries for pages that no longer exist.
+        sources = {str(source) for source in sources}
+        if set(self.entries) - sources:
+            self.entries = {path: entry for path, entry in self.entries.items() if path in sources}
+            self._changed = True
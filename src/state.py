@@ -0,0 +1,33 @@
+import json, os
+
+
+# Build state kept between runs (the manifest, caches and indexes under
+# .cache/) is stored as one JSON object per file with a "version" key.
+
+def load_state(path, version):
+    # The object saved at path, or {} when the file is missing, unreadable or
+    # written by another version, so callers start over with empty state.
+    if path is None or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        print(f"State file '{path}' is unreadable, ignoring it.")
+        return {}
+    if not isinstance(data, dict) or data.get("version") != version:
+        return {}
+    return data
+
+def save_state(path, version, data):
+    # Written to a temporary sibling and moved into place, so an interrupted
+    # save never leaves a truncated file. One json.dumps call without indent
+    # runs in the C encoder, several times faster than json.dump; serve mode
+    # saves after every build.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        file.write(json.dumps(dict(data, version=version), sort_keys=True))
+    os.replace(tmp_path, path)
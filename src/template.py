@@ -0,0 +1,180 @@
+import io, os, re
+
+
+PLACEHOLDER_REGEX_PATTERN = r"\{\{\s*([A-Za-z_][\w\-]*)\s*\}\}"
+INCLUDE_REGEX_PATTERN = r"\{\{>\s*([^\s}]+)\s*\}\}"
+BASEPATH_REGEX_PATTERN = r'(href|src)="/'
+ASSET_URL_REGEX_PATTERN = r'(href|src)="/([^"?#]*)'
+
+_placeholder_regex = re.compile(PLACEHOLDER_REGEX_PATTERN)
+_include_regex = re.compile(INCLUDE_REGEX_PATTERN)
+_basepath_regex = re.compile(BASEPATH_REGEX_PATTERN)
+_asset_url_regex = re.compile(ASSET_URL_REGEX_PATTERN)
+_template_cache = {}
+
+DIR_LAYOUTS = "layouts"
+# rendered in place of the basepath when one page is written for several
+# basepaths; never valid in markdown or HTML, so it can't clash with content
+BASEPATH_PLACEHOLDER = "\x00basepath\x00"
+_placeholder_site_regex = re.compile(rf'(?:href|src)="?{re.escape(BASEPATH_PLACEHOLDER)}')
+# characters that would change how the minifier treats an attribute value
+UNQUOTABLE_CHARACTERS = re.compile(r"""[\s"'=<>`]""")
+
+def resolve_template(page_path, default_template, layout=None):
+    # Picks the template for a page: the layout named in its front matter
+    # (layouts/<name>.html next to the default template), else the nearest
+    # file named like the default template in the page's directory or one of
+    # its parents, up to the default template's own directory.
+    root = os.path.dirname(str(default_template))
+    if layout:
+        path = os.path.join(root, DIR_LAYOUTS, f"{layout}.html")
+        if not os.path.isfile(path):
+            raise ValueError(f"Layout '{layout}' not found, expected {path}")
+        return path
+
+    name = os.path.basename(str(default_template))
+    root = os.path.abspath(root)
+    directory = os.path.dirname(str(page_path))
+    if os.path.commonpath([root, os.path.abspath(directory)]) == root:
+        while os.path.abspath(directory) != root:
+            candidate = os.path.join(directory, name)
+            if os.path.isfile(candidate):
+                return candidate
+            directory = os.path.dirname(directory)
+    return str(default_template)
+
+def expand_includes(path, source, dependencies, stack=()):
+    # Inlines every {{> partial }} in source, resolved relative to the file
+    # that includes it, recursively. Each partial read is appended to
+    # dependencies.
+    stack = stack + (path,)
+
+    def include(match):
+        partial = os.path.normpath(os.path.join(os.path.dirname(path), match.group(1)))
+        if partial in stack:
+            raise ValueError(f"Template include cycle: {' -> '.join(stack + (partial,))}")
+        if not os.path.isfile(partial):
+            raise ValueError(f"Partial '{match.group(1)}' included from {path} not found")
+        with open(partial, 'r') as file:
+            partial_source = file.read()
+        if partial not in dependencies:
+            dependencies.append(partial)
+        return expand_includes(partial, partial_source, dependencies, stack)
+
+    return _include_regex.sub(include, source)
+
+def rewrite_basepath(html, basepath, asset_map=None):
+    # Rewrites root-relative href="/ and src="/ attributes to start with
+    # basepath. With an asset_map ({"images/a.png": "images/a.<hash>.png"}),
+    # asset URLs are swapped for their fingerprinted names in the same pass.
+    if '="/' not in html or not (basepath or asset_map):
+        return html
+    if not asset_map:
+        return _basepath_regex.sub(lambda match: f'{match.group(1)}="{basepath}', html)
+
+    prefix = basepath or "/"
+    def replace(match):
+        path = match.group(2)
+        return f'{match.group(1)}="{prefix}{asset_map.get(path, path)}'
+    return _asset_url_regex.sub(replace, html)
+
+def fill_basepath(html, basepath):
+    # Turns a page rendered with BASEPATH_PLACEHOLDER as its basepath into
+    # the page rendered with basepath.
+    return html.replace(BASEPATH_PLACEHOLDER, basepath or "/")
+
+def placeholder_only_in_links(html):
+    # True when every placeholder in html is one the basepath rewrite put at
+    # the start of an href or src, i.e. fill_basepath() touches nothing else.
+    return html.count(BASEPATH_PLACEHOLDER) == len(_placeholder_site_regex.findall(html))
+
+class Template():
+    # A template parsed once into alternating literal segments and named
+    # slots. Rendering a page is then a single join instead of one full-page
+    # str.replace per placeholder.
+    def __init__(self, source):
+        self.literals = []
+        self.slots = []
+
+        position = 0
+        for match in _placeholder_regex.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.literals.append(source[position:])
+
+        self._rewritten_literals = {}
+        self.dependencies = [] # partials inlined into this template
+
+    @classmethod
+    def from_file(cls, path):
+        # Parsed templates are cached per process and re-read only when the
+        # file or one of its partials changes.
+        path = str(path)
+        cached = _template_cache.get(path)
+        if cached is not None and cached[0] == _mtimes([path] + cached[1].dependencies):
+            return cached[1]
+
+        with open(path, 'r') as file:
+            source = file.read()
+        dependencies = []
+        template = cls(expand_includes(path, source, dependencies))
+        template.dependencies = dependencies
+        _template_cache[path] = (_mtimes([path] + dependencies), template)
+        return template
+
+    @property
+    def variables(self):
+        return [name for name, _ in self.slots]
+
+    def _literals_for(self, basepath, asset_map=None):
+        if not (basepath or asset_map):
+            return self.literals
+        key = (basepath, id(asset_map))
+        cached = self._rewritten_literals.get(key)
+        # the asset map is kept alongside so its id can't be reused while cached
+        if cached is None or cached[0] is not asset_map:
+            cached = (asset_map, [rewrite_basepath(literal, basepath, asset_map) for literal in self.literals])
+            self._rewritten_literals[key] = cached
+        return cached[1]
+
+    def render(self, variables, basepath=None, asset_map=None):
+        buffer = io.StringIO()
+        self.write(buffer, variables, basepath, asset_map)
+        return buffer.getvalue()
+
+    def write(self, stream, variables, basepath=None, asset_map=None):
+        # Writes the page into a file-like object. A variable is either a
+        # string or a node with write_html() (e.g. a ParentNode), which is
+        # serialized straight into the stream. Placeholders without a matching
+        # variable are left in place as written.
+        literals = self._literals_for(basepath, asset_map)
+        node_stream = _BasepathWriter(stream, basepath, asset_map) if (basepath or asset_map) else stream
+        stream.write(literals[0])
+        for (name, placeholder), literal in zip(self.slots, literals[1:]):
+            value = variables.get(name)
+            if value is None:
+                stream.write(placeholder)
+            elif hasattr(value, "write_html"):
+                value.write_html(node_stream)
+            else:
+                stream.write(rewrite_basepath(str(value), basepath, asset_map))
+            stream.write(literal)
+
+def _mtimes(paths):
+    try:
+        return [os.stat(path).st_mtime_ns for path in paths]
+    except FileNotFoundError:
+        return None
+
+class _BasepathWriter():
+    # Applies the basepath rewrite to each chunk on its way into the stream.
+    # Nodes emit every attribute within a single chunk, so a rewritten
+    # href="/ or src="/ never straddles two writes.
+    def __init__(self, stream, basepath, asset_map=None):
+        self.stream = stream
+        self.basepath = basepath
+        self.asset_map = asset_map
+
+    def write(self, chunk):
+        return self.stream.write(rewrite_basepath(chunk, self.basepath, self.asset_map))
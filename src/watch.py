@@ -0,0 +1,133 @@
+import os, time
+import threading
+
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_TIMEOUT = 25 # seconds a reload poll is held open
+LIVE_RELOAD_SCRIPT = """<script>
+(function () {
+  var version = -1;
+  function poll() {
+    fetch("%s?since=" + version).then(function (response) { return response.text(); }).then(function (text) {
+      if (version !== -1 && text !== String(version)) { location.reload(); return; }
+      version = Number(text);
+      poll();
+    }).catch(function () { setTimeout(poll, 1000); });
+  }
+  poll();
+})();
+</script>""" % LIVE_RELOAD_PATH
+
+def snapshot(paths):
+    # Maps every file under the given files/directories to (mtime_ns, size).
+    # Files deleted while they are being listed (editors' temporary files)
+    # are left out, as if they had been gone already.
+    state = {}
+    for path in paths:
+        try:
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+            elif os.path.isdir(path):
+                _snapshot_dir(path, state)
+        except FileNotFoundError:
+            continue
+    return state
+
+def _snapshot_dir(directory, state):
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    _snapshot_dir(entry.path, state)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                continue
+
+def changed_paths(old, new):
+    # Paths added, removed or modified between two snapshots.
+    changed = {path for path in new if old.get(path) != new[path]}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+def watch(paths, on_change, interval=0.25, stop_event=None):
+    # Polls the paths and calls on_change(changed) with each batch of changes.
+    # Polling keeps this stdlib-only and works the same on every platform.
+    state = snapshot(paths)
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(interval)
+        new_state = snapshot(paths)
+        changed = changed_paths(state, new_state)
+        state = new_state
+        if changed:
+            on_change(changed)
+
+class LiveReload():
+    # A build counter that browsers long-poll; bumping it reloads open pages.
+    def __init__(self):
+        self.version = 0
+        self._condition = threading.Condition()
+
+    def bump(self):
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, since, timeout=LIVE_RELOAD_TIMEOUT):
+        with self._condition:
+            if since >= 0:
+                self._condition.wait_for(lambda: self.version != since, timeout)
+            return self.version
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    basepath = "/"
+    live_reload = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if self.live_reload is not None and url.path == LIVE_RELOAD_PATH:
+            since = int(parse_qs(url.query).get("since", ["-1"])[0])
+            self._send_text(str(self.live_reload.wait(since)), "text/plain")
+            return
+
+        if self.basepath != "/" and url.path.startswith(self.basepath):
+            self.path = "/" + self.path[len(self.basepath):]
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if self.live_reload is not None and path.endswith(".html") and os.path.isfile(path):
+            with open(path, 'r') as file:
+                page = file.read()
+            if "</body>" in page:
+                page = page.replace("</body>", f"{LIVE_RELOAD_SCRIPT}</body>", 1)
+            else:
+                page += LIVE_RELOAD_SCRIPT
+            self._send_text(page, "text/html")
+            return
+        super().do_GET()
+
+    def _send_text(self, text, content_type):
+        body = text.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(directory, port, basepath="/", live_reload=None):
+    # Starts a threaded HTTP server for directory in the background and returns it.
+    handler = type("Handler", (DevRequestHandler,), {"basepath": basepath or "/", "live_reload": live_reload})
+    server = ThreadingHTTPServer(("", port), partial(handler, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+
+from assets import copy_file, copy_files, plan_sync, sync_directory
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "public")
+        self._write(os.path.join(self.source, "index.css"), "body {}")
+        self._write(os.path.join(self.source, "images", "a.png"), "png bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def _read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def test_initial_sync_copies_everything(self):
+        stats = sync_directory(self.source, self.dest)
+        self.assertEqual((stats.copied, stats.unchanged, stats.removed), (2, 0, 0))
+        self.assertEqual(stats.bytes_copied, len("body {}") + len("png bytes"))
+        self.assertEqual(self._read(os.path.join(self.dest, "images", "a.png")), "png bytes")
+
+    def test_second_sync_copies_nothing(self):
+        sync_directory(self.source, self.dest)
+        stats = sync_directory(self.source, self.dest)
+        self.assertEqual((stats.copied, stats.unchanged), (0, 2))
+
+    def test_changed_file_is_copied(self):
+        sync_directory(self.source, self.dest)
+        self._write(os.path.join(self.source, "index.css"), "body { color: red }")
+        stats = sync_directory(self.source, self.dest, compare="hash")
+        self.assertEqual(stats.copied, 1)
+        self.assertEqual(self._read(os.path.join(self.dest, "index.css")), "body { color: red }")
+
+    def test_prune_keeps_listed_outputs(self):
+        sync_directory(self.source, self.dest)
+        page = os.path.join(self.dest, "blog", "index.html")
+        self._write(page, "<html></html>")
+        self._write(os.path.join(self.dest, "old", "stale.txt"), "stale")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+
+        stats = sync_directory(self.source, self.dest, keep=[page])
+        self.assertEqual(stats.removed, 2)
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    def test_prune_keeps_siblings_of_expected_outputs(self):
+        page = os.path.join(self.dest, "index.html")
+        self._write(page, "<html></html>")
+        self._write(f"{page}.gz", "gz")
+        self._write(os.path.join(self.dest, "gone.html.gz"), "gz")
+
+        plan = plan_sync(self.source, self.dest, keep=[page], sibling_suffixes=[".gz"])
+        self.assertEqual(plan.stats.removed, 1)
+        self.assertTrue(os.path.exists(f"{page}.gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "gone.html.gz")))
+
+    def test_threaded_copy(self):
+        for i in range(20):
+            self._write(os.path.join(self.source, "many", f"{i}.txt"), str(i) * 100)
+        plan = plan_sync(self.source, self.dest)
+        self.assertEqual(len(plan.copies), 22)
+        self.assertFalse(os.path.exists(self.dest))
+
+        stats = copy_files(plan, threads=4)
+        self.assertEqual(stats.copied, 22)
+        self.assertGreater(stats.bytes_per_second, 0)
+        self.assertEqual(self._read(os.path.join(self.dest, "many", "7.txt")), "7" * 100)
+
+    def test_hardlink(self):
+        stats = sync_directory(self.source, self.dest, hardlink=True)
+        self.assertEqual(stats.methods, {"hardlink": 2})
+        self.assertTrue(os.path.samefile(os.path.join(self.source, "index.css"), os.path.join(self.dest, "index.css")))
+
+    def test_copy_file_replaces_hardlink_instead_of_writing_through(self):
+        source = os.path.join(self.source, "index.css")
+        dest = os.path.join(self.tmp.name, "copy.css")
+        other = os.path.join(self.tmp.name, "other.css")
+        self._write(other, "other")
+        os.link(source, dest)
+
+        copy_file(other, dest)
+        self.assertEqual(self._read(dest), "other")
+        self.assertEqual(self._read(source), "body {}")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+
+from block_cache import BlockCache, block_key
+from block_markdown import markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = BlockCache()
+        key = block_key("# Title")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<h1>Title</h1>")
+        self.assertEqual(cache.get(key), "<h1>Title</h1>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_save_and_load(self):
+        cache = BlockCache()
+        cache.put("a", "A")
+        cache.put("b", "B")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "blocks.json")
+            cache.save(path)
+            loaded = BlockCache.load(path, max_entries=1)
+        self.assertEqual(dict(loaded.entries), {"b": "B"})
+
+    def test_take_and_merge_changes(self):
+        worker = BlockCache()
+        worker.get("a")
+        worker.put("a", "A")
+        changes = worker.take_changes()
+        self.assertEqual(worker.take_changes(), {"hits": 0, "misses": 0, "entries": {}})
+
+        parent = BlockCache()
+        parent.merge_changes(changes)
+        self.assertEqual(parent.misses, 1)
+        self.assertEqual(parent.get("a"), "A")
+
+    def test_markdown_to_html_node_with_cache(self):
+        md = "# Title\n\nShared **footer** text\n\n- a\n- b"
+        expected = markdown_to_html_node(md).to_html()
+        cache = BlockCache()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+if __name__ == "__main__":
+    unittest.main()
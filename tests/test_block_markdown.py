@@ -4,7 +4,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 import unittest
 
-from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node, extract_title
+from io import StringIO
+
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node, extract_title, iter_blocks, common_indent
+from block_markdown import BlockStreamNode, common_indent_of_lines, find_title
 
 class TestBlockMarkdown(unittest.TestCase):
 
@@ -86,6 +89,90 @@ class TestBlockMarkdown(unittest.TestCase):
         blocks = markdown_to_blocks(md)
         assert blocks == []    
 
+    def test_markdown_to_blocks_fenced_code_with_blank_lines(self):
+        md = """
+        Intro
+
+        ```
+        first line
+
+        after a blank line
+        ```
+
+        Outro
+        """
+        blocks = markdown_to_blocks(md)
+        assert blocks == ["Intro", "```\nfirst line\n\nafter a blank line\n```", "Outro"]
+
+    def test_markdown_to_blocks_unterminated_fence(self):
+        md = "```\nnot closed\n\nnext block"
+        blocks = markdown_to_blocks(md)
+        assert blocks == ["```\nnot closed", "next block"]
+
+    def test_inline_code_line_does_not_open_fence(self):
+        md = "```npm install```\n\nSome paragraph.\n\n```\ncode\n```"
+        self.assertEqual(markdown_to_blocks(md), ["```npm install```", "Some paragraph.", "```\ncode\n```"])
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><p><code>npm install</code></p><p>Some paragraph.</p><pre><code>code\n</code></pre></div>",
+        )
+        self.assertEqual(block_to_block_type("```a```\ncode\n```"), BlockType.CODE)
+        self.assertEqual(list(iter_blocks("```a```\ncode\n```".split("\n")))[0][0], BlockType.CODE)
+
+    def test_empty_document(self):
+        self.assertEqual(markdown_to_html_node("").to_html(), "<div></div>")
+        self.assertEqual(markdown_to_html_node("\n  \n").to_html(), "<div></div>")
+
+    def test_common_indent(self):
+        self.assertEqual(common_indent("    a\n      b\n\n    c"), "    ")
+        self.assertEqual(common_indent("a\n    b"), "")
+        self.assertEqual(common_indent(""), "")
+
+    def test_common_indent_of_lines(self):
+        for md in ("    a\n      b\n\n    c", "a\n    b", "", "  \n\t\tx\n\t\ty\n"):
+            self.assertEqual(common_indent_of_lines(StringIO(md)), common_indent(md))
+
+    def test_block_stream_matches_tree(self):
+        md = "  # h\n\n  ```\n  code\n\n  more\n  ```\n\n  > q\n\n  - a\n  - [b](/b)\n\n  text **bold**\n"
+        stream = StringIO()
+        BlockStreamNode(StringIO(md), common_indent(md)).write_html(stream)
+        self.assertEqual(stream.getvalue(), markdown_to_html_node(md).to_html())
+
+    def test_block_to_block_type_first_character(self):
+        cases = {
+            "#": BlockType.PARAGRAPH,
+            "####### seven": BlockType.PARAGRAPH,
+            "```\nunclosed": BlockType.PARAGRAPH,
+            ">": BlockType.QUOTE,
+            "-x": BlockType.PARAGRAPH,
+            "- a\nb": BlockType.PARAGRAPH,
+            "+ a\n* b": BlockType.UNORDERED_LIST,
+            "1. a\n3. b": BlockType.PARAGRAPH,
+            "10. a": BlockType.PARAGRAPH,
+            "": BlockType.PARAGRAPH,
+        }
+        for block, block_type in cases.items():
+            self.assertEqual(block_to_block_type(block), block_type, block)
+
+    def test_iter_blocks_types(self):
+        md = "# h\n\n```\ncode\n\nmore\n```\n\n> q\n\n- a\n- b\n\n1. a\n2. b\n\ntext"
+        types = [block_type for block_type, _ in iter_blocks(md.split("\n"))]
+        self.assertEqual(types, [
+            BlockType.HEADING,
+            BlockType.CODE,
+            BlockType.QUOTE,
+            BlockType.UNORDERED_LIST,
+            BlockType.ORDERED_LIST,
+            BlockType.PARAGRAPH,
+        ])
+
+    def test_iter_blocks_file_lines(self):
+        lines = ["# Title\n", "\n", "- a\n", "- b\n"]
+        self.assertEqual(list(iter_blocks(lines)), [
+            (BlockType.HEADING, "# Title"),
+            (BlockType.UNORDERED_LIST, "- a\n- b"),
+        ])
+
     # tests for block_to_block_type
     def test_paragraph(self):
         block = "This is a simple paragraph with no special formatting."
@@ -304,6 +391,22 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
     
+    def test_codeblock_with_blank_lines(self):
+        md = """
+```
+def f():
+
+    return 1
+```
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>def f():\n\n    return 1\n</code></pre></div>",
+        )
+
     def test_extract_title(self):
         md = "# Hello"
         title = extract_title(md)
@@ -318,6 +421,14 @@ Hello!!!
         title = extract_title(md)
         self.assertEqual(title, "Helllllllooooo")
     
+    def test_extract_title_indented(self):
+        md = "    text\n     # not a title\n\n    # Title  \n    # Later"
+        self.assertEqual(extract_title(md), "Title")
+        self.assertEqual(find_title(StringIO(md), common_indent(md)), "Title")
+        self.assertEqual(find_title(StringIO("a\n# b\n")), "b")
+        with self.assertRaises(Exception):
+            find_title(StringIO("#Hello\n"))
+
     def test_invalid_extract_title_no_discernable_h1(self):
         md = "#Hello"
         with self.assertRaises(Exception):
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+
+import compress
+
+from compress import compress_bytes, compress_outputs
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.output, "blog"))
+        self.index_path = os.path.join(self.tmp.name, "cache", "compressed.json")
+        self.page = os.path.join(self.output, "blog", "index.html")
+        self._write(self.page, "<p>hello</p>" * 200)
+        self._write(os.path.join(self.output, "index.css"), "body {}")
+        self._write(os.path.join(self.output, "tom.png"), "png" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def test_gzip_is_deterministic(self):
+        data = b"<p>hello</p>" * 100
+        self.assertEqual(compress_bytes(data, "gzip"), compress_bytes(data, "gzip"))
+        self.assertEqual(gzip.decompress(compress_bytes(data, "gzip")), data)
+
+    def test_compresses_large_text_outputs_only(self):
+        stats = compress_outputs(self.output, ["gzip"], min_size=1024, index_path=self.index_path)
+        self.assertEqual((stats.compressed, stats.too_small), (1, 1))
+        with open(f"{self.page}.gz", 'rb') as file, open(self.page, 'rb') as page:
+            self.assertEqual(gzip.decompress(file.read()), page.read())
+        self.assertFalse(os.path.exists(os.path.join(self.output, "index.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.output, "tom.png.gz")))
+
+    def test_unchanged_outputs_are_skipped(self):
+        compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        with mock.patch.object(compress, "_compress_file", wraps=compress._compress_file) as compress_file:
+            stats = compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        self.assertEqual((stats.compressed, stats.unchanged), (0, 1))
+        compress_file.assert_not_called()
+
+        self._write(self.page, "<p>changed</p>" * 200)
+        stats = compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        self.assertEqual(stats.compressed, 1)
+        with open(f"{self.page}.gz", 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), b"<p>changed</p>" * 200)
+
+    def test_missing_sibling_is_recompressed(self):
+        compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        os.remove(f"{self.page}.gz")
+        stats = compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        self.assertEqual(stats.compressed, 1)
+        self.assertTrue(os.path.exists(f"{self.page}.gz"))
+
+    def test_stale_siblings_are_removed(self):
+        compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        self._write(os.path.join(self.output, "archive.tar.gz"), "not ours")
+        os.remove(self.page)
+        stats = compress_outputs(self.output, ["gzip"], index_path=self.index_path)
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(f"{self.page}.gz"))
+        self.assertTrue(os.path.exists(os.path.join(self.output, "archive.tar.gz")))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            compress_bytes(b"data", "lzma")
+
+
+if __name__ == "__main__":
+    unittest.main()
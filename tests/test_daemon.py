@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from io import StringIO
+
+from daemon import handle_request, send_request, serve_socket, serve_stream
+
+
+def echo_handler(request):
+    print(f"handling {request['command']}")
+    if request["command"] == "fail":
+        raise ValueError("broken")
+    return {"echo": request.get("value")}
+
+class TestProtocol(unittest.TestCase):
+    def test_response_carries_result_log_and_id(self):
+        line, stop = handle_request('{"command": "echo", "value": 3, "id": "a"}', echo_handler)
+        response = json.loads(line)
+        self.assertFalse(stop)
+        self.assertEqual((response["ok"], response["echo"], response["id"]), (True, 3, "a"))
+        self.assertEqual(response["log"], ["handling echo"])
+
+    def test_errors_are_responses(self):
+        response = json.loads(handle_request('{"command": "fail"}', echo_handler)[0])
+        self.assertEqual((response["ok"], response["error"]), (False, "ValueError: broken"))
+        self.assertEqual(response["log"], ["handling fail"])
+        for line in ("not json", "[1, 2]"):
+            response = json.loads(handle_request(line, echo_handler)[0])
+            self.assertFalse(response["ok"])
+            self.assertIn("Invalid request", response["error"])
+
+    def test_serve_stream_until_shutdown(self):
+        requests = StringIO('{"command": "echo", "value": 1}\n\n{"command": "shutdown"}\n{"command": "echo", "value": 2}\n')
+        output = StringIO()
+        serve_stream(echo_handler, requests, output, {"command": "echo", "value": 0, "id": "start"})
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([response.get("echo") for response in responses], [0, 1, None])
+        self.assertEqual(responses[0]["id"], "start")
+        self.assertTrue(responses[-1]["ok"])
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix domain sockets")
+class TestSocket(unittest.TestCase):
+    def test_requests_over_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "build.sock")
+            ready = threading.Event()
+            server = threading.Thread(target=serve_socket, args=(path, echo_handler, lambda _: ready.set()))
+            server.start()
+            self.assertTrue(ready.wait(5))
+            self.assertEqual(send_request(path, {"command": "echo", "value": "x"}, timeout=5)["echo"], "x")
+            with self.assertRaisesRegex(Exception, "already listening"):
+                serve_socket(path, echo_handler)
+            self.assertTrue(send_request(path, {"command": "shutdown"}, timeout=5)["ok"])
+            server.join(5)
+            self.assertFalse(server.is_alive())
+            self.assertFalse(os.path.exists(path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from contextlib import redirect_stdout
+from io import StringIO
+
+from feeds import ATOM_NAMESPACE, SITEMAP_NAMESPACE, SiteFeeds, XmlWriter, sitemap_files, timestamp, write_sitemaps
+
+
+SITEMAP = f"{{{SITEMAP_NAMESPACE}}}"
+ATOM = f"{{{ATOM_NAMESPACE}}}"
+
+class TestXmlWriter(unittest.TestCase):
+    def test_escaping(self):
+        stream = StringIO()
+        writer = XmlWriter(stream)
+        writer.start("a", {"title": 'x "y" & z'})
+        writer.element("b", "1 < 2 & 3")
+        writer.element("c", attributes={"href": "/?a=1&b=2"})
+        writer.close()
+        root = ET.fromstring(stream.getvalue().encode())
+        self.assertEqual(root.get("title"), 'x "y" & z')
+        self.assertEqual(root.find("b").text, "1 < 2 & 3")
+        self.assertEqual(root.find("c").get("href"), "/?a=1&b=2")
+
+    def test_timestamp(self):
+        self.assertEqual(timestamp("2024-01-31"), "2024-01-31T00:00:00Z")
+        self.assertEqual(timestamp("2024-01-31T10:30:00+02:00"), "2024-01-31T10:30:00+02:00")
+
+class TestSitemaps(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_single_sitemap(self):
+        paths = write_sitemaps([("/", None), ("/blog/a/", "2024-01-31")], self.tmp.name, "https://example.com/", "/site/")
+        self.assertEqual(paths, [os.path.join(self.tmp.name, "sitemap.xml")])
+        urls = ET.parse(paths[0]).getroot().findall(f"{SITEMAP}url")
+        self.assertEqual([url.find(f"{SITEMAP}loc").text for url in urls], ["https://example.com/site/", "https://example.com/site/blog/a/"])
+        self.assertIsNone(urls[0].find(f"{SITEMAP}lastmod"))
+        self.assertEqual(urls[1].find(f"{SITEMAP}lastmod").text, "2024-01-31T00:00:00Z")
+
+    def test_split_into_sitemap_index(self):
+        entries = [(f"/page{i}.html", None) for i in range(5)]
+        self.assertEqual(sitemap_files(5, max_urls=2), ["sitemap.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml"])
+        paths = write_sitemaps(entries, self.tmp.name, "https://example.com", max_urls=2)
+        index = ET.parse(paths[0]).getroot()
+        self.assertEqual(index.tag, f"{SITEMAP}sitemapindex")
+        self.assertEqual([loc.text for loc in index.iter(f"{SITEMAP}loc")],
+                         [f"https://example.com/sitemap-{i}.xml" for i in range(1, 4)])
+        locs = [loc.text for path in paths[1:] for loc in ET.parse(path).getroot().iter(f"{SITEMAP}loc")]
+        self.assertEqual(locs, [f"https://example.com/page{i}.html" for i in range(5)])
+
+class TestSiteFeeds(unittest.TestCase):
+    def test_outputs_match_written_files(self):
+        records = [
+            {"title": "Home", "url": "/"},
+            {"title": "Old & new", "url": "/blog/old/", "date": "2023-05-01", "author": "Tom"},
+            {"title": "New", "url": "/blog/new/", "date": "2024-03-01", "summary": "Latest"},
+            {"title": "Undated", "url": "/blog/undated/"},
+        ]
+        feeds = SiteFeeds("https://example.com")
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()):
+            paths = feeds.write(tmp, records, ["/blog/"])
+            self.assertEqual(paths, [os.path.join(tmp, name) for name in feeds.outputs(records, ["/blog/"])])
+            self.assertEqual(len(ET.parse(paths[0]).getroot()), 5)
+
+            feed = ET.parse(os.path.join(tmp, "blog", "feed.xml")).getroot()
+            self.assertEqual(feed.find(f"{ATOM}updated").text, "2024-03-01T00:00:00Z")
+            entries = feed.findall(f"{ATOM}entry")
+            self.assertEqual([entry.find(f"{ATOM}title").text for entry in entries], ["New", "Old & new"])
+            self.assertEqual(entries[0].find(f"{ATOM}summary").text, "Latest")
+            self.assertEqual(entries[1].find(f"{ATOM}author/{ATOM}name").text, "Tom")
+
+    def test_no_feed_without_dated_posts(self):
+        feeds = SiteFeeds("https://example.com", sitemap=False)
+        records = [{"title": "Undated", "url": "/blog/undated/"}]
+        self.assertEqual(feeds.outputs(records), [])
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()):
+            self.assertEqual(feeds.write(tmp, records), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+from unittest import mock
+
+import fingerprint
+
+from fingerprint import AssetHashIndex, build_asset_map, fingerprinted_dest, fingerprinted_name
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        self._write(os.path.join(self.static, "index.css"), "body {}")
+        self._write(os.path.join(self.static, "images", "tom.png"), "png")
+        self.index_path = os.path.join(self.tmp.name, "cache", "hashes.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("images/tom.png", "0123456789abcdef"), "images/tom.0123456789.png")
+        self.assertEqual(fingerprinted_name("LICENSE", "0123456789abcdef"), "LICENSE.0123456789")
+
+    def test_build_asset_map(self):
+        asset_map = build_asset_map(self.static, AssetHashIndex(self.index_path))
+        self.assertEqual(set(asset_map), {"index.css", "images/tom.png"})
+        self.assertRegex(asset_map["images/tom.png"], r"^images/tom\.[0-9a-f]{10}\.png$")
+
+    def test_content_change_changes_fingerprint(self):
+        index = AssetHashIndex(self.index_path)
+        before = build_asset_map(self.static, index)
+        self._write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        after = build_asset_map(self.static, index)
+        self.assertNotEqual(before["index.css"], after["index.css"])
+        self.assertEqual(before["images/tom.png"], after["images/tom.png"])
+
+    def test_unchanged_files_are_not_rehashed(self):
+        index = AssetHashIndex(self.index_path)
+        build_asset_map(self.static, index)
+        index.save()
+
+        reloaded = AssetHashIndex.load(self.index_path)
+        with mock.patch.object(fingerprint, "hash_file") as hash_file:
+            build_asset_map(self.static, reloaded)
+        hash_file.assert_not_called()
+
+    def test_fingerprinted_dest(self):
+        asset_map = {"images/tom.png": "images/tom.abc.png"}
+        output = os.path.join("out")
+        self.assertEqual(fingerprinted_dest(os.path.join(output, "images", "tom.png"), output, asset_map), os.path.join(output, "images", "tom.abc.png"))
+        self.assertEqual(fingerprinted_dest(os.path.join(output, "other.txt"), output, asset_map), os.path.join(output, "other.txt"))
+
+if __name__ == "__main__":
+    unittest.main()
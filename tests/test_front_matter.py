@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+
+from block_markdown import extract_title
+from front_matter import read_front_matter, read_page_header, split_front_matter, template_variables
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        self.assertEqual(split_front_matter("# Title\n\n---\n"), ({}, "# Title\n\n---\n"))
+
+    def test_split_front_matter(self):
+        meta, body = split_front_matter("---\nlayout: post\n# a comment\ntitle: A: B\n---\n# Title\n")
+        self.assertEqual(meta, {"layout": "post", "title": "A: B"})
+        self.assertEqual(body, "# Title\n")
+
+    def test_invalid_front_matter(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\nlayout: post\n# Title\n")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\nnot a pair\n---\n")
+
+    def test_read_front_matter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as file:
+                file.write("---\nlayout: post\n---\n# Title\n")
+            self.assertEqual(read_front_matter(path), {"layout": "post"})
+            with open(path, 'w') as file:
+                file.write("# Title\n")
+            self.assertEqual(read_front_matter(path), {})
+
+    def test_template_variables(self):
+        meta, _ = split_front_matter('---\ntags: a, b\ndraft: false\ndate: 2024-01-31\nsummary: "Fish & <chips>"\n---\n# T')
+        self.assertEqual(template_variables(meta), {"tags": "a, b", "draft": "false", "date": "2024-01-31", "summary": "Fish &amp; &lt;chips&gt;"})
+
+    def test_typed_fields(self):
+        meta, _ = split_front_matter("---\ntitle: \"Hello\"\ndate: 2024-01-31\ntags: python, web\ndraft: true\n---\n")
+        self.assertEqual(meta, {"title": "Hello", "date": "2024-01-31", "tags": ["python", "web"], "draft": True})
+        meta, _ = split_front_matter("---\ntags: [a, 'b']\n---\n")
+        self.assertEqual(meta["tags"], ["a", "b"])
+        meta, _ = split_front_matter("---\ntags:\n  - a\n  - b\ndraft: false\n---\n")
+        self.assertEqual(meta, {"tags": ["a", "b"], "draft": False})
+
+    def test_invalid_typed_fields(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ndraft: maybe\n---\n")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ndate: last tuesday\n---\n")
+
+    def test_read_page_header(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as file:
+                file.write("---\ntags: a\n---\nIntro\n\n# Heading\n\n# Later\n")
+            self.assertEqual(read_page_header(path), {"tags": ["a"], "title": "Heading"})
+            with open(path, 'w') as file:
+                file.write("# Heading\n")
+            self.assertEqual(read_page_header(path), {"title": "Heading"})
+
+    def test_read_page_header_title_matches_rendered_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            for body in ("Intro\n\n    # not a title\n\n# Heading\n", "  Intro\n\n  # Heading\n"):
+                with open(path, 'w') as file:
+                    file.write(body)
+                self.assertEqual(read_page_header(path), {"title": extract_title(body)})
+            with open(path, 'w') as file:
+                file.write("---\ntags: a\n---\nno heading\n")
+            self.assertEqual(read_page_header(path), {"tags": ["a"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
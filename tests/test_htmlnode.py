@@ -3,6 +3,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 import unittest
+from io import StringIO
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from textnode import TextNode, TextType
@@ -245,5 +246,37 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("b", "x"), ParentNode("p", [LeafNode(None, "x")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    # streaming serialization
+    def test_write_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold text"), LeafNode(None, "Normal text")]),
+                LeafNode("a", "link", {"href": "/blog"}),
+            ],
+            {"class": "content"},
+        )
+        stream = StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+
+    def test_emit_html_chunks(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/x"}), LeafNode(None, "text")])
+        chunks = []
+        node.emit_html(chunks.append)
+        self.assertEqual(chunks, ["<p>", '<a href="/x">link</a>', "text", "</p>"])
+
+    def test_write_html_deep_tree(self):
+        node = LeafNode("b", "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        stream = StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), "<span>" * 200 + "<b>x</b>" + "</span>" * 200)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
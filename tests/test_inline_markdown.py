@@ -253,5 +253,53 @@ class TestSplitNodesDelimiter(unittest.TestCase):
                     ]
         self.assertListEqual(text_to_textnodes(text), node_list)
 
+    def test_text_to_textnodes_plain(self):
+        self.assertListEqual(text_to_textnodes("just text"), [TextNode("just text", TextType.TEXT)])
+        self.assertListEqual(text_to_textnodes(""), [TextNode("", TextType.TEXT)])
+
+    def test_text_to_textnodes_code_keeps_markup(self):
+        self.assertListEqual(
+            text_to_textnodes("call `snake_case_name(**kwargs)` now"),
+            [
+                TextNode("call ", TextType.TEXT),
+                TextNode("snake_case_name(**kwargs)", TextType.CODE),
+                TextNode(" now", TextType.TEXT),
+            ],
+        )
+
+    def test_text_to_textnodes_link_url_with_underscore(self):
+        self.assertListEqual(
+            text_to_textnodes("see [the docs](https://example.com/some_page) and _this_"),
+            [
+                TextNode("see ", TextType.TEXT),
+                TextNode("the docs", TextType.LINK, "https://example.com/some_page"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("this", TextType.ITALIC),
+            ],
+        )
+
+    def test_text_to_textnodes_brackets_without_link(self):
+        self.assertListEqual(
+            text_to_textnodes("[< Back] and ![not an image] **ok**"),
+            [
+                TextNode("[< Back] and ![not an image] ", TextType.TEXT),
+                TextNode("ok", TextType.BOLD),
+            ],
+        )
+
+    def test_text_to_textnodes_image_then_link_same_text(self):
+        self.assertListEqual(
+            text_to_textnodes("![a](b) [a](b)"),
+            [
+                TextNode("a", TextType.IMAGE, "b"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+            ],
+        )
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this is **not closed")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
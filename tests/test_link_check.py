@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from block_cache import BlockCache
+from block_markdown import markdown_to_html_node
+from inline_markdown import collect_links
+from link_check import LinkIndex, check_links, link_targets, output_paths
+
+
+class TestCollectLinks(unittest.TestCase):
+    def test_links_and_images_are_collected(self):
+        markdown = "# [Home](/)\n\nSee ![a](/a.png) and [b](b.html)\n\n- [c](https://example.com)\n\n```\n[not](/a/link)\n```"
+        with collect_links() as links:
+            markdown_to_html_node(markdown)
+        self.assertEqual(links, ["/", "/a.png", "b.html", "https://example.com"])
+
+    def test_cached_blocks_keep_their_links(self):
+        cache = BlockCache()
+        with collect_links() as first:
+            markdown_to_html_node("[a](/a)\n\ntext", cache)
+        with collect_links() as second:
+            markdown_to_html_node("[a](/a)\n\ntext", cache)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(first, ["/a"])
+        self.assertEqual(second, ["/a"])
+
+    def test_nested_collection(self):
+        with collect_links() as outer:
+            with collect_links() as inner:
+                markdown_to_html_node("[a](/a)")
+        self.assertEqual(inner, ["/a"])
+        self.assertEqual(outer, ["/a"])
+
+class TestLinkCheck(unittest.TestCase):
+    def test_link_targets(self):
+        self.assertEqual(link_targets("/", "blog/a/index.html"), ("index.html",))
+        self.assertEqual(link_targets("/blog/tom/", "index.html"), ("blog/tom/index.html",))
+        self.assertEqual(link_targets("/blog/tom#intro", "index.html"), ("blog/tom", "blog/tom.html", "blog/tom/index.html"))
+        self.assertEqual(link_targets("../b/x%20y.png", "blog/a/index.html"), ("blog/b/x y.png", "blog/b/x y.png.html", "blog/b/x y.png/index.html"))
+        for url in ("https://example.com/", "//cdn.example.com/x.js", "mailto:a@example.com", "#top"):
+            self.assertIsNone(link_targets(url, "index.html"))
+
+    def test_check_links(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "public")
+            for name in ("index.html", "blog/a/index.html", "images/a.png", "about.html"):
+                os.makedirs(os.path.dirname(os.path.join(output, name)), exist_ok=True)
+                open(os.path.join(output, name), 'w').close()
+            self.assertEqual(output_paths(output), {"index.html", "blog/a/index.html", "images/a.png", "about.html"})
+
+            index = LinkIndex(os.path.join(tmp, "links.json"))
+            index.update({
+                "content/index.md": (os.path.join(output, "index.html"), ["/blog/a/", "/about", "/images/a.png", "https://example.com"]),
+                "content/blog/a/index.md": (os.path.join(output, "blog", "a", "index.html"), ["../../about.html", "/missing", "b/", "/about"]),
+            })
+            report = check_links(index, output_paths(output), output)
+            self.assertEqual((report.checked, report.skipped), (7, 1))
+            self.assertEqual(report.dangling, [("content/blog/a/index.md", "/missing"), ("content/blog/a/index.md", "b/")])
+            self.assertIn("2 dangling", str(report))
+
+    def test_link_index_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "links.json")
+            index = LinkIndex(path)
+            index.update({"a.md": ("public/a.html", ["/b"]), "b.md": ("public/b.html", [])})
+            index.prune(["a.md"])
+            index.save()
+            loaded = LinkIndex.load(path)
+            self.assertIn("a.md", loaded)
+            self.assertNotIn("b.md", loaded)
+            with open(path, 'w') as file:
+                file.write("{")
+            with redirect_stdout(StringIO()):
+                self.assertEqual(LinkIndex.load(path).pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+
+from listings import blog_posts, plan_listings, slugify
+
+
+def post(name, date=None, tags=(), title=None):
+    record = {"title": title or name.title(), "url": f"/blog/{name}/", "source": f"content/blog/{name}/index.md"}
+    if date:
+        record["date"] = date
+    if tags:
+        record["tags"] = list(tags)
+    return record
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            {"title": "Home", "url": "/", "source": "content/index.md"},
+            post("old", "2023-05-01", ["Tolkien"]),
+            post("new", "2024-03-01", ["Tolkien", "Elves & Men"]),
+            post("undated"),
+            post("same-day", "2024-03-01", title="Another"),
+        ]
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Elves & Men"), "elves-men")
+        self.assertEqual(slugify("--"), "")
+
+    def test_blog_posts_newest_first(self):
+        self.assertEqual([record["url"] for record in blog_posts(self.records)],
+                         ["/blog/same-day/", "/blog/new/", "/blog/old/", "/blog/undated/"])
+
+    def test_plan_listings(self):
+        listings = plan_listings(self.records, page_size=2)
+        self.assertEqual([listing.path for listing in listings], [
+            "blog/index.html",
+            "blog/page/2/index.html",
+            "blog/tags/elves-men/index.html",
+            "blog/tags/tolkien/index.html",
+            "blog/archive/2024/index.html",
+            "blog/archive/2023/index.html",
+        ])
+        self.assertEqual(listings[1].title, "Blog (page 2 of 2)")
+        self.assertEqual(listings[2].title, "Posts tagged Elves & Men")
+        self.assertEqual(plan_listings(self.records[:1]), [])
+        with self.assertRaises(ValueError):
+            plan_listings(self.records, page_size=0)
+
+    def test_listing_html(self):
+        listing = plan_listings(self.records, page_size=2)[1]
+        self.assertEqual(listing.to_html_node().to_html(),
+            '<div><h1>Blog (page 2 of 2)</h1><ul>'
+            '<li><a href="/blog/old/">Old</a> <time>2023-05-01</time></li>'
+            '<li><a href="/blog/undated/">Undated</a></li>'
+            '</ul><nav><a href="/blog/" rel="prev">Newer posts</a></nav></div>')
+        self.assertIn("Elves &amp; Men", plan_listings(self.records)[1].to_html_node().to_html())
+
+    def test_digest_tracks_shown_fields_only(self):
+        before = plan_listings(self.records)[0].digest()
+        self.records[1]["tags"] = ["Rings"]
+        self.assertEqual(plan_listings(self.records)[0].digest(), before)
+        self.records[1]["title"] = "Renamed"
+        self.assertNotEqual(plan_listings(self.records)[0].digest(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import multiprocessing
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import main
+from main import build_incremental, discover_files, generate_pages
+from feeds import SiteFeeds
+from manifest import BuildManifest
+from site_index import SiteIndex
+
+
+TEMPLATE = "<title>{{ Title }}</title><a href=\"/x\">{{ Content }}</a>"
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        for i in range(6):
+            self._write(os.path.join(self.content, "blog", f"post{i}.md"), f"# Post {i}\n\nSome **bold** text {i}")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\n- [a post](/blog/post1)")
+        self._write(self.template, TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def _build(self, output, jobs, minify=False):
+        pages = list(discover_files(self.content, output, ".html"))
+        with redirect_stdout(StringIO()):
+            failed = generate_pages(pages, self.template, "/base/", jobs, minify=minify)
+        outputs = {}
+        for _, dest_path in pages:
+            if os.path.exists(dest_path):
+                with open(dest_path) as file:
+                    outputs[os.path.relpath(dest_path, output)] = file.read()
+        return failed, outputs
+
+    def test_parallel_output_matches_serial(self):
+        serial_failed, serial = self._build(os.path.join(self.tmp.name, "serial"), 1)
+        parallel_failed, parallel = self._build(os.path.join(self.tmp.name, "parallel"), 3)
+        self.assertEqual(serial_failed, set())
+        self.assertEqual(parallel_failed, set())
+        self.assertEqual(len(serial), 7)
+        self.assertEqual(serial, parallel)
+
+    def test_parallel_failures_report_source_path(self):
+        bad_page = os.path.join(self.content, "blog", "untitled.md")
+        self._write(bad_page, "no heading here")
+        failed, outputs = self._build(os.path.join(self.tmp.name, "out"), 2)
+        self.assertEqual(failed, {bad_page})
+        self.assertEqual(len(outputs), 7)
+
+    def test_started_after_workers_fork(self):
+        pages = list(discover_files(self.content, os.path.join(self.tmp.name, "out"), ".html"))
+        for jobs in (1, 3):
+            with self.subTest(jobs=jobs):
+                calls = []
+                with redirect_stdout(StringIO()):
+                    generate_pages(pages, self.template, "/", jobs, started=lambda: calls.append(len(multiprocessing.active_children())))
+                self.assertEqual(calls, [0 if jobs == 1 else jobs])
+
+    def test_hardlink_needs_sync(self):
+        with redirect_stdout(StringIO()), mock.patch("sys.stderr", StringIO()), self.assertRaises(SystemExit):
+            main.parse_args(["local", "--hardlink"])
+        self.assertTrue(main.parse_args(["local", "--sync", "--hardlink"]).hardlink)
+
+    def test_minified_output(self):
+        self._write(self.template, "<html>\n  <title>{{ Title }}</title>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n")
+        _, outputs = self._build(os.path.join(self.tmp.name, "serial"), 1, minify=True)
+        _, parallel = self._build(os.path.join(self.tmp.name, "parallel"), 3, minify=True)
+        self.assertEqual(outputs, parallel)
+        self.assertEqual(
+            outputs[os.path.join("index.html")],
+            "<html><title>Home</title><body><div><h1>Home</h1><ul><li><a href=/base/blog/post1>a post</a></li></ul></div></body></html>",
+        )
+
+    def test_large_page_path_matches(self):
+        self._write(os.path.join(self.content, "big.md"), "---\ntags: a\n---\n  Intro [link](/x)\n\n  # Big\n\n  ```\n  code\n  ```\n")
+        _, outputs = self._build(os.path.join(self.tmp.name, "normal"), 1)
+        with mock.patch.object(main, "LARGE_PAGE_SIZE", 1):
+            _, streamed = self._build(os.path.join(self.tmp.name, "streamed"), 1)
+        self.assertEqual(outputs, streamed)
+        self.assertIn("<title>Big</title>", streamed["big.html"])
+
+    def test_front_matter_template_variables(self):
+        self._write(self.template, "<title>{{ Title }}</title><meta content=\"{{ tags }}\">{{ date }} {{ author }}")
+        self._write(os.path.join(self.content, "index.md"), "---\ntags: [a, b]\ndate: 2024-01-31\n---\n# Home")
+        _, outputs = self._build(os.path.join(self.tmp.name, "out"), 1)
+        self.assertEqual(outputs["index.html"], '<title>Home</title><meta content="a, b">2024-01-31 {{ author }}')
+
+    def test_front_matter_only_page(self):
+        self._write(os.path.join(self.content, "empty.md"), "---\ntitle: Hi\n---\n")
+        failed, outputs = self._build(os.path.join(self.tmp.name, "out"), 1)
+        self.assertEqual(failed, set())
+        self.assertEqual(outputs["empty.html"], '<title>Hi</title><a href="/base/x"><div></div></a>')
+        with mock.patch.object(main, "LARGE_PAGE_SIZE", 1):
+            _, streamed = self._build(os.path.join(self.tmp.name, "streamed"), 1)
+        self.assertEqual(streamed["empty.html"], outputs["empty.html"])
+
+    def test_links_collected_from_workers(self):
+        for jobs in (1, 3):
+            output = os.path.join(self.tmp.name, f"jobs{jobs}")
+            pages = list(discover_files(self.content, output, ".html"))
+            links = {}
+            with redirect_stdout(StringIO()):
+                generate_pages(pages, self.template, "/base/", jobs, links=links)
+            self.assertEqual(len(links), 7)
+            self.assertEqual(links[os.path.join(self.content, "index.md")], (os.path.join(output, "index.html"), ["/blog/post1"]))
+
+    def test_targets_match_separate_builds(self):
+        self._write(os.path.join(self.content, "code.md"), "# Code\n\n```\n<a href=\"/raw\">  x</a>\n```")
+        bases = ["/", "/base/", "/with space/"]
+        for minify in (False, True):
+            expected = [self._build_with_basepath(os.path.join(self.tmp.name, f"single{i}"), basepath, minify) for i, basepath in enumerate(bases)]
+            outputs = [os.path.join(self.tmp.name, f"multi-{minify}-{i}") for i in range(len(bases))]
+            targets = main.OutputTargets(list(zip(outputs, bases)))
+            for jobs in (1, 2):
+                pages = list(discover_files(self.content, outputs[0], ".html"))
+                with redirect_stdout(StringIO()):
+                    self.assertEqual(generate_pages(pages, self.template, "/", jobs, minify=minify, targets=targets), set())
+                self.assertEqual([self._read_outputs(output) for output in outputs], expected)
+
+    def test_targets_render_once(self):
+        targets = main.OutputTargets([(os.path.join(self.tmp.name, "a"), "/"), (os.path.join(self.tmp.name, "b"), "/b/")])
+        pages = list(discover_files(self.content, os.path.join(self.tmp.name, "a"), ".html"))
+        with redirect_stdout(StringIO()), mock.patch.object(main, "write_page", wraps=main.write_page) as write_page:
+            generate_pages(pages, self.template, "/", targets=targets)
+        write_page.assert_not_called()
+        with self.assertRaisesRegex(ValueError, "targeted more than once"):
+            main.OutputTargets([("a", "/"), ("a/", "/b/")])
+
+    def _build_with_basepath(self, output, basepath, minify):
+        pages = list(discover_files(self.content, output, ".html"))
+        with redirect_stdout(StringIO()):
+            generate_pages(pages, self.template, basepath, minify=minify)
+        return self._read_outputs(output)
+
+    def _read_outputs(self, output):
+        outputs = {}
+        for directory, _, files in os.walk(output):
+            for name in files:
+                with open(os.path.join(directory, name)) as file:
+                    outputs[os.path.relpath(os.path.join(directory, name), output)] = file.read()
+        return outputs
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.output = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.footer = os.path.join(root, "partials", "footer.html")
+        self._write(self.template, "<main>{{ Content }}</main>")
+        self._write(os.path.join(self.content, "blog", "template.html"), "<main>{{ Content }}</main>{{> ../../partials/footer.html }}")
+        self._write(self.footer, "<footer>v1</footer>")
+        self._write(os.path.join(self.content, "index.md"), "# Home")
+        self._write(os.path.join(self.content, "blog", "a.md"), "# A")
+        self._write(os.path.join(self.content, "blog", "b.md"), "# B")
+        self.manifest = BuildManifest(os.path.join(root, "manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def _build(self, site_index=None, listing_size=None, feeds=None):
+        output = StringIO()
+        with redirect_stdout(output):
+            build_incremental(os.path.join(self.tmp.name, "static"), self.content, self.template, self.output,
+                              manifest=self.manifest, site_index=site_index, listing_size=listing_size, feeds=feeds)
+        self.output_lines = output.getvalue().splitlines()
+        return self.output_lines[-1]
+
+    def test_partial_change_rebuilds_only_its_pages(self):
+        self.assertIn("3 page(s) rendered", self._build())
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "template.html")))
+        self._write(self.footer, "<footer>v2</footer>")
+        self.assertIn("2 page(s) rendered", self._build())
+        with open(os.path.join(self.output, "blog", "a.html")) as file:
+            self.assertEqual(file.read(), "<main><div><h1>A</h1></div></main><footer>v2</footer>")
+        self.assertIn("0 page(s) rendered", self._build())
+
+    def test_new_section_template_rebuilds_its_section(self):
+        self._build()
+        self._write(os.path.join(self.content, "blog", "template.html"), "<section>{{ Content }}</section>")
+        self.assertIn("2 page(s) rendered", self._build())
+        self._write(os.path.join(self.content, "template.html"), "<div>{{ Content }}</div>")
+        self.assertIn("1 page(s) rendered", self._build())
+
+    def test_drafts_are_left_out(self):
+        index = SiteIndex(os.path.join(self.tmp.name, "site-index.json"))
+        self._write(os.path.join(self.content, "blog", "b.md"), "---\ndraft: true\n---\n# B")
+        self._build(index)
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "b.html")))
+        self._write(os.path.join(self.content, "blog", "b.md"), "---\ntitle: Bee\n---\n# B")
+        self._build(index)
+        with open(os.path.join(self.output, "blog", "b.html")) as file:
+            self.assertIn("<h1>B</h1>", file.read())
+        self._write(os.path.join(self.content, "blog", "b.md"), "---\ndraft: true\n---\n# B")
+        self._build(index)
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "b.html")))
+
+    def test_listings_rewrite_only_affected_pages(self):
+        index = SiteIndex(os.path.join(self.tmp.name, "site-index.json"))
+        self._write(os.path.join(self.content, "blog", "a.md"), "---\ndate: 2024-01-01\ntags: x\n---\n# A")
+        self._write(os.path.join(self.content, "blog", "b.md"), "---\ndate: 2023-01-01\ntags: y\n---\n# B")
+        self._build(index, listing_size=10)
+        self.assertIn("Listings: 5 of 5 page(s) written.", self.output_lines)
+        with open(os.path.join(self.output, "blog", "index.html")) as file:
+            self.assertIn('<a href="/blog/a.html">A</a>', file.read())
+
+        self._write(os.path.join(self.content, "blog", "b.md"), "---\ndate: 2023-01-01\ntags: y\n---\n# B\n\nNew text")
+        self._build(index, listing_size=10)
+        self.assertIn("Listings: 0 of 5 page(s) written.", self.output_lines)
+
+        self._write(os.path.join(self.content, "blog", "b.md"), "---\ndate: 2023-01-01\ntags: z\n---\n# B")
+        self._build(index, listing_size=10)
+        self.assertIn("Listings: 1 of 5 page(s) written.", self.output_lines)
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "tags", "y", "index.html")))
+
+    def test_sitemap_and_feed_follow_the_build(self):
+        self._write(os.path.join(self.content, "blog", "a.md"), "---\ndate: 2024-01-01\n---\n# A")
+        self._build(feeds=SiteFeeds("https://example.com"))
+        sitemap = os.path.join(self.output, "sitemap.xml")
+        feed = os.path.join(self.output, "blog", "feed.xml")
+        with open(sitemap) as file:
+            self.assertIn("<loc>https://example.com/blog/b.html</loc>", file.read())
+        self.assertTrue(os.path.exists(feed))
+        self._write(os.path.join(self.content, "blog", "a.md"), "# A")
+        self._build(feeds=SiteFeeds("https://example.com"))
+        self.assertFalse(os.path.exists(feed))
+        self._build()
+        self.assertFalse(os.path.exists(sitemap))
+
+class TestBuildSession(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self._write(main.TEMPLATE_FILE, '<link href="/style.css"><main>{{ Content }}</main>')
+        self._write(os.path.join(main.DIR_CONTENT, "index.md"), "# Home")
+        self._write(os.path.join(main.DIR_CONTENT, "a.md"), "# A")
+        self._write(os.path.join(main.DIR_STATIC, "style.css"), "body {}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def _read(self, path):
+        with open(os.path.join("out", path)) as file:
+            return file.read()
+
+    def test_full_build_forgets_incremental_manifest(self):
+        with redirect_stdout(StringIO()):
+            main.build(main.parse_args(["local", "--incremental"]), "out", "/")
+            main.build(main.parse_args(["local"]), "out", "/other/")
+            self.assertFalse(os.path.exists(main.manifest_path("out")))
+            main.build(main.parse_args(["local", "--incremental"]), "out", "/")
+        self.assertEqual(self._read("index.html"), '<link href="/style.css"><main><div><h1>Home</h1></div></main>')
+        with open(os.path.join("out", "style.css")) as file:
+            self.assertEqual(file.read(), "body {}")
+
+    def test_watch_without_site_index(self):
+        def one_change(paths, on_change, interval):
+            self._write(os.path.join(main.DIR_CONTENT, "a.md"), "# A2")
+            on_change({os.path.join(main.DIR_CONTENT, "a.md")})
+        with redirect_stdout(StringIO()) as output, mock.patch.object(main, "serve"), mock.patch.object(main, "watch", one_change):
+            main.watch_site("out", "/")
+        self.assertNotIn("Rebuild failed", output.getvalue())
+        self.assertEqual(self._read("a.html"), '<link href="/style.css"><main><div><h1>A2</h1></div></main>')
+
+    def test_builds_only_what_changed(self):
+        session = main.BuildSession("out", "/")
+        with redirect_stdout(StringIO()):
+            session.rebuild()
+            self.assertEqual(self._read("a.html"), '<link href="/style.css"><main><div><h1>A</h1></div></main>')
+            self.assertEqual(session.build(), {"changed": []})
+
+            self._write(os.path.join(main.DIR_CONTENT, "a.md"), "# A2")
+            self.assertEqual(session.build(), {"changed": [os.path.join(main.DIR_CONTENT, "a.md")]})
+            self.assertEqual(self._read("a.html"), '<link href="/style.css"><main><div><h1>A2</h1></div></main>')
+
+            self._write(os.path.join(main.DIR_CONTENT, "a.md"), "# A third")
+            self.assertEqual(session.build([os.path.abspath(os.path.join(main.DIR_CONTENT, "a.md"))]), {"changed": [os.path.join(main.DIR_CONTENT, "a.md")]})
+            self.assertEqual(session.build(), {"changed": []})
+            self.assertEqual(self._read("a.html"), '<link href="/style.css"><main><div><h1>A third</h1></div></main>')
+
+            os.remove(os.path.join(main.DIR_CONTENT, "a.md"))
+            session.build()
+            self.assertFalse(os.path.exists(os.path.join("out", "a.html")))
+            self.assertEqual(session.handle({"command": "status"})["builds"], 6)
+        with self.assertRaisesRegex(ValueError, "Unknown command"):
+            session.handle({"command": "nope"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from manifest import BuildManifest, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "page.md")
+        self.dest = os.path.join(self.tmp.name, "page.html")
+        self.manifest_path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        self._write(self.source, "# Hello")
+        self._write(self.dest, "<h1>Hello</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def test_unknown_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.dest, [self.source], "/"))
+
+    def test_recorded_output_is_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source], "/")
+        self.assertTrue(manifest.is_fresh(self.dest, [self.source], "/"))
+
+    def test_changed_source_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source], "/")
+        manifest.save()
+
+        self._write(self.source, "# Hello, again")
+        reloaded = BuildManifest.load(self.manifest_path)
+        self.assertFalse(reloaded.is_fresh(self.dest, [self.source], "/"))
+
+    def test_changed_template_or_basepath_is_not_fresh(self):
+        # templates are sources like the page itself
+        template = os.path.join(os.path.dirname(self.source), "template.html")
+        self._write(template, "{{ Content }}")
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source, template], "/")
+        self.assertTrue(manifest.is_fresh(self.dest, [self.source, template], "/"))
+        self.assertFalse(manifest.is_fresh(self.dest, [self.source], "/"))
+        self.assertFalse(manifest.is_fresh(self.dest, [self.source, template], "/static-site/"))
+        self._write(template, "<main>{{ Content }}</main>")
+        manifest.forget_hashes()
+        self.assertFalse(manifest.is_fresh(self.dest, [self.source, template], "/"))
+
+    def test_changed_options_are_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source], "/", {"minify": True})
+        self.assertTrue(manifest.is_fresh(self.dest, [self.source], "/", {"minify": True}))
+        self.assertFalse(manifest.is_fresh(self.dest, [self.source], "/"))
+
+    def test_missing_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source], "/")
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_fresh(self.dest, [self.source], "/"))
+
+    def test_save_and_load_roundtrip(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source], "/")
+        manifest.save()
+
+        reloaded = BuildManifest.load(self.manifest_path)
+        self.assertEqual(reloaded.outputs, manifest.outputs)
+        self.assertEqual(reloaded.outputs[self.dest]["sources"][self.source], hash_file(self.source))
+
+    def test_stale_outputs(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.dest, [self.source], "/")
+        self.assertEqual(manifest.stale_outputs([self.dest]), [])
+        self.assertEqual(manifest.stale_outputs([]), [self.dest])
+
+    def test_load_unreadable_manifest(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        self._write(self.manifest_path, "not json")
+        with redirect_stdout(StringIO()):
+            manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.outputs, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from io import StringIO
+from unittest import mock
+
+import minify
+
+from minify import HtmlMinifier, minify_html
+
+
+class TestMinify(unittest.TestCase):
+    def test_whitespace_between_block_tags_is_dropped(self):
+        html = "<html>\n  <body>\n    <div>\n      <p>Hello   world</p>\n    </div>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<html><body><div><p>Hello world</p></div></body></html>")
+
+    def test_whitespace_between_inline_tags_is_collapsed(self):
+        self.assertEqual(minify_html("<p><b>bold</b>\n  <i>italic</i> text\n</p>"), "<p><b>bold</b> <i>italic</i> text</p>")
+
+    def test_comments_are_dropped(self):
+        self.assertEqual(minify_html("<div><!-- note --><p>x</p></div>"), "<div><p>x</p></div>")
+        self.assertEqual(minify_html("<!--[if IE]><p>old</p><![endif]-->"), "<!--[if IE]><p>old</p><![endif]-->")
+
+    def test_optional_quotes_are_dropped(self):
+        self.assertEqual(
+            minify_html('<a href="/blog/tom/" title="two words">x</a>'),
+            '<a href=/blog/tom/ title="two words">x</a>',
+        )
+        self.assertEqual(minify_html('<img src="tom.png" alt="">'), '<img src=tom.png alt="">')
+
+    def test_quotes_kept_before_slash_or_attribute(self):
+        self.assertEqual(minify_html('<img src="x.png"/>'), '<img src="x.png"/>')
+        self.assertEqual(minify_html('<img src="x.png" />'), '<img src=x.png />')
+        self.assertEqual(minify_html('<a class="x"href="/a">b</a>'), '<a class="x"href="/a">b</a>')
+
+    def test_pre_and_code_are_untouched(self):
+        html = "<div>\n<pre><code>def f():\n    return  1\n</code></pre>\n<p>use <code>a  b</code>  here</p>\n</div>"
+        self.assertEqual(minify_html(html), "<div><pre><code>def f():\n    return  1\n</code></pre><p>use <code>a  b</code> here</p></div>")
+
+    def test_stray_angle_brackets_are_text(self):
+        self.assertEqual(minify_html("<p>a < b and c > d</p>"), "<p>a < b and c > d</p>")
+
+    def test_chunked_writes_match_single_write(self):
+        html = (
+            "<html>\n <head><title> Page </title></head>\n <body>\n"
+            "  <p>Some <b>bold</b>  and <a href=\"/x\">link</a></p>\n  <!-- a comment -->\n"
+            "  <pre><code>keep   this\n  </code></pre>\n  <ul>\n   <li>one</li>\n   <li>two</li>\n  </ul>\n </body>\n</html>\n"
+        )
+        expected = minify_html(html)
+        with mock.patch.object(minify, "FEED_SIZE", 1):
+            for size in (1, 2, 3, 5, 8, 13):
+                output = StringIO()
+                minifier = HtmlMinifier(output)
+                for i in range(0, len(html), size):
+                    minifier.write(html[i:i + size])
+                minifier.close()
+                self.assertEqual(output.getvalue(), expected, f"chunk size {size}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import tempfile
+import time
+import unittest
+
+import block_markdown
+import profiler
+
+from profiler import BuildProfiler
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_nested_phases_use_self_time(self):
+        build_profiler = BuildProfiler()
+        with build_profiler.phase("outer"):
+            time.sleep(0.01)
+            with build_profiler.phase("inner"):
+                time.sleep(0.02)
+        outer_calls, outer_seconds = build_profiler.phases["outer"]
+        inner_calls, inner_seconds = build_profiler.phases["inner"]
+        self.assertEqual((outer_calls, inner_calls), (1, 1))
+        self.assertGreaterEqual(inner_seconds, 0.02)
+        self.assertLess(outer_seconds, inner_seconds)
+
+    def test_span_is_noop_when_inactive(self):
+        self.assertIsNone(profiler.active())
+        with profiler.span("anything"):
+            pass
+
+    def test_activate_instruments_and_restores(self):
+        original = block_markdown.text_to_textnodes
+        build_profiler = BuildProfiler()
+        build_profiler.activate()
+        try:
+            with profiler.page("page.md"):
+                block_markdown.markdown_to_html_node("# Title\n\nSome **text**").to_html()
+        finally:
+            build_profiler.deactivate()
+
+        self.assertIs(block_markdown.text_to_textnodes, original)
+        self.assertIsNone(profiler.active())
+        self.assertEqual(build_profiler.phases["text_to_textnodes"][0], 2)
+        self.assertEqual(build_profiler.phases["block_to_html_node"][0], 2)
+        self.assertIn("page.md", build_profiler.pages)
+        self.assertIn("page.md", build_profiler.report())
+
+    def test_activate_replaces_inherited_profiler(self):
+        original = block_markdown.text_to_textnodes
+        parent = BuildProfiler()
+        parent.activate()
+        worker = BuildProfiler()
+        worker.activate()
+        try:
+            block_markdown.text_to_textnodes("Some **text**")
+        finally:
+            worker.deactivate()
+
+        self.assertIs(block_markdown.text_to_textnodes, original)
+        self.assertEqual(worker.phases["text_to_textnodes"][0], 1)
+        self.assertEqual(parent.phases, {})
+
+    def test_merge_worker_data(self):
+        worker = BuildProfiler(trace=True)
+        with worker.page("a.md"):
+            with worker.phase("read"):
+                pass
+        parent = BuildProfiler(trace=True)
+        parent.merge_data(worker.take_data())
+        self.assertEqual(worker.phases, {})
+        self.assertEqual(parent.phases["read"][0], 1)
+        self.assertEqual(len(parent.events), 2)
+
+    def test_write_trace(self):
+        build_profiler = BuildProfiler(trace=True)
+        with build_profiler.phase("write"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            build_profiler.write_trace(path)
+            with open(path) as file:
+                events = json.load(file)["traceEvents"]
+        self.assertEqual(events[0]["name"], "write")
+        self.assertEqual(events[0]["ph"], "X")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import site_index
+from site_index import SiteIndex, page_url
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.index_path = os.path.join(self.tmp.name, "cache", "site-index.json")
+        self.post = self._write("blog/post.md", "---\ndate: 2024-01-31\ntags: a, b\n---\n# Post\n\nBody")
+        self.draft = self._write("blog/draft.md", "---\ndraft: true\n---\n# Draft\n")
+        self.home = self._write("index.md", "# Home\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.content, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def test_page_url(self):
+        self.assertEqual(page_url(self.home, self.content), "/")
+        self.assertEqual(page_url(self.post, self.content), "/blog/post.html")
+        self.assertEqual(page_url(os.path.join(self.content, "blog", "index.md"), self.content), "/blog/")
+
+    def test_pages_skip_drafts(self):
+        index = SiteIndex(self.index_path)
+        records = index.pages(self.content, [self.home, self.post, self.draft])
+        self.assertEqual(records, [
+            {"title": "Home", "source": self.home, "url": "/"},
+            {"title": "Post", "date": "2024-01-31", "tags": ["a", "b"], "source": self.post, "url": "/blog/post.html"},
+        ])
+        self.assertTrue(index.excludes(self.draft))
+        self.assertFalse(SiteIndex(self.index_path, include_drafts=True).excludes(self.draft))
+
+    def test_cached_on_disk(self):
+        index = SiteIndex(self.index_path)
+        index.pages(self.content, [self.home, self.post])
+        index.save()
+        index = SiteIndex.load(self.index_path)
+        with mock.patch.object(site_index, "read_page_header") as read:
+            self.assertEqual(index.metadata(self.post)["title"], "Post")
+            read.assert_not_called()
+        self._write("blog/post.md", "---\ntitle: Renamed post\n---\n")
+        self.assertEqual(index.metadata(self.post), {"title": "Renamed post"})
+
+    def test_invalid_and_removed_pages(self):
+        broken = self._write("broken.md", "---\ndraft: perhaps\n---\n")
+        index = SiteIndex(self.index_path)
+        with redirect_stdout(StringIO()) as output:
+            records = index.pages(self.content, [self.home, broken])
+        self.assertEqual([record["url"] for record in records], ["/"])
+        self.assertIn("broken.md", output.getvalue())
+        self.assertFalse(index.excludes(broken))
+        index.pages(self.content, [self.home, self.post])
+        index.prune([self.home])
+        self.assertEqual(list(index.entries), [self.home])
+
+    def test_unreadable_index_is_ignored(self):
+        os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path, 'w') as file:
+            file.write("{not json")
+        with redirect_stdout(StringIO()):
+            self.assertEqual(SiteIndex.load(self.index_path).entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
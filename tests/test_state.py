@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from state import load_state, save_state
+
+
+class TestState(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "state.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load_roundtrip(self):
+        save_state(self.path, 3, {"entries": {"a": [1, 2]}})
+        self.assertEqual(load_state(self.path, 3), {"version": 3, "entries": {"a": [1, 2]}})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["state.json"])
+
+    def test_missing_or_other_version_is_empty(self):
+        self.assertEqual(load_state(self.path, 1), {})
+        self.assertEqual(load_state(None, 1), {})
+        save_state(self.path, 1, {"entries": {}})
+        self.assertEqual(load_state(self.path, 2), {})
+
+    def test_unreadable_is_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        for text in ("{not json", "[1, 2]"):
+            with open(self.path, 'w') as file:
+                file.write(text)
+            with redirect_stdout(StringIO()):
+                self.assertEqual(load_state(self.path, 1), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
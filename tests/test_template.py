@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import BASEPATH_PLACEHOLDER, Template, fill_basepath, placeholder_only_in_links, resolve_template, rewrite_basepath
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parse_segments(self):
+        template = Template("<title>{{ Title }}</title><body>{{Content}}</body>")
+        self.assertEqual(template.literals, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(template.variables, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        page = template.render({"Title": "Hello", "Content": "<p>hi</p>"})
+        self.assertEqual(page, "<title>Hello</title><article><p>hi</p></article>")
+
+    def test_render_repeated_and_custom_variables(self):
+        template = Template("{{ Title }}|{{ author }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "T", "author": "Tolkien"}), "T|Tolkien|T")
+
+    def test_render_missing_variable_left_in_place(self):
+        template = Template("<p>{{ Title }}</p>{{ date }}")
+        self.assertEqual(template.render({"Title": "T"}), "<p>T</p>{{ date }}")
+
+    def test_render_no_placeholders(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({"Title": "T"}), "<p>static</p>")
+
+    def test_render_basepath(self):
+        template = Template('<link href="/index.css" /><article>{{ Content }}</article>')
+        page = template.render({"Content": '<a href="/blog">b</a><img src="/a.png" alt="">'}, "/static-site/")
+        self.assertEqual(
+            page,
+            '<link href="/static-site/index.css" /><article><a href="/static-site/blog">b</a><img src="/static-site/a.png" alt=""></article>',
+        )
+
+    def test_render_matches_str_replace(self):
+        source = '<title>{{ Title }}</title><link href="/x.css" /><main>{{ Content }}</main>'
+        content = '<a href="/a">a</a><a href="https://b">b</a><img src="/c.png" alt="c"></img>'
+        expected = source.replace("{{ Title }}", "T").replace("{{ Content }}", content)
+        expected = expected.replace('href="/', 'href="/base/').replace('src="/', 'src="/base/')
+        self.assertEqual(Template(source).render({"Title": "T", "Content": content}, "/base/"), expected)
+
+    def test_render_node_variable(self):
+        template = Template('<link href="/a.css" />{{ Content }}')
+        node = ParentNode("p", [LeafNode("a", "home", {"href": "/"}), LeafNode("img", "", {"src": "/t.png"})])
+        self.assertEqual(
+            template.render({"Content": node}, "/base/"),
+            '<link href="/base/a.css" /><p><a href="/base/">home</a><img src="/base/t.png"></img></p>',
+        )
+
+    def test_render_asset_map(self):
+        template = Template('<link href="/index.css" />{{ Content }}')
+        asset_map = {"index.css": "index.abc.css", "images/t.png": "images/t.def.png"}
+        page = template.render({"Content": '<img src="/images/t.png"><a href="/blog">b</a>'}, "/base/", asset_map)
+        self.assertEqual(page, '<link href="/base/index.abc.css" /><img src="/base/images/t.def.png"><a href="/base/blog">b</a>')
+
+    def test_rewrite_asset_map_without_basepath(self):
+        self.assertEqual(rewrite_basepath('<img src="/a.png">', None, {"a.png": "a.1.png"}), '<img src="/a.1.png">')
+
+    def test_rewrite_basepath_without_basepath(self):
+        self.assertEqual(rewrite_basepath('<a href="/x">', None), '<a href="/x">')
+
+    def test_fill_basepath_matches_render(self):
+        template = Template('<link href="/index.css" />{{ Content }}')
+        variables = {"Content": ParentNode("p", [LeafNode("a", "home", {"href": "/"}), LeafNode("img", "", {"src": "/t.png"})])}
+        page = template.render(variables, BASEPATH_PLACEHOLDER, {"t.png": "t.1.png"})
+        self.assertTrue(placeholder_only_in_links(page))
+        for basepath in (None, "/", "/static-site/"):
+            self.assertEqual(fill_basepath(page, basepath), template.render(variables, basepath, {"t.png": "t.1.png"}))
+
+    def test_placeholder_outside_links(self):
+        page = Template("<p>{{ Content }}</p>").render({"Content": f'<a href="/x">{BASEPATH_PLACEHOLDER}</a>'}, BASEPATH_PLACEHOLDER)
+        self.assertFalse(placeholder_only_in_links(page))
+
+    def test_from_file_reloads_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as file:
+                file.write("{{ Title }}")
+            first = Template.from_file(path)
+            self.assertIs(Template.from_file(path), first)
+
+            with open(path, 'w') as file:
+                file.write("<h1>{{ Title }}</h1>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(Template.from_file(path).render({"Title": "T"}), "<h1>T</h1>")
+
+class TestIncludesAndLayouts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.template = os.path.join(self.root, "template.html")
+        self._write(self.template, "<html>{{> partials/head.html }}{{ Content }}</html>")
+        self._write(os.path.join(self.root, "partials", "head.html"), "<head>{{> meta.html }}</head>")
+        self._write(os.path.join(self.root, "partials", "meta.html"), "<title>{{ Title }}</title>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def test_includes_are_expanded_relative_to_the_including_file(self):
+        template = Template.from_file(self.template)
+        self.assertEqual(template.render({"Title": "T", "Content": "c"}), "<html><head><title>T</title></head>c</html>")
+        self.assertEqual(template.dependencies, [
+            os.path.join(self.root, "partials", "head.html"),
+            os.path.join(self.root, "partials", "meta.html"),
+        ])
+
+    def test_partial_change_reloads_template(self):
+        Template.from_file(self.template)
+        meta = os.path.join(self.root, "partials", "meta.html")
+        self._write(meta, "<title>{{ Title }}!</title>")
+        os.utime(meta, ns=(0, 0))
+        self.assertEqual(Template.from_file(self.template).render({"Title": "T", "Content": ""}), "<html><head><title>T!</title></head></html>")
+
+    def test_include_errors(self):
+        self._write(os.path.join(self.root, "partials", "meta.html"), "{{> head.html }}")
+        with self.assertRaisesRegex(ValueError, "include cycle"):
+            Template.from_file(self.template)
+        self._write(self.template, "{{> missing.html }}")
+        with self.assertRaisesRegex(ValueError, "not found"):
+            Template.from_file(self.template)
+
+    def test_resolve_section_template(self):
+        page = os.path.join(self.root, "content", "blog", "tom", "index.md")
+        self.assertEqual(resolve_template(page, self.template), self.template)
+        section = os.path.join(self.root, "content", "blog", "template.html")
+        self._write(section, "{{ Content }}")
+        self.assertEqual(resolve_template(page, self.template), section)
+        self.assertEqual(resolve_template(os.path.join(self.root, "content", "index.md"), self.template), self.template)
+
+    def test_resolve_layout(self):
+        page = os.path.join(self.root, "content", "index.md")
+        layout = os.path.join(self.root, "layouts", "post.html")
+        self._write(layout, "{{ Content }}")
+        self.assertEqual(resolve_template(page, self.template, "post"), layout)
+        with self.assertRaisesRegex(ValueError, "Layout 'missing' not found"):
+            resolve_template(page, self.template, "missing")
+
+if __name__ == "__main__":
+    unittest.main()
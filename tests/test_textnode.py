@@ -36,6 +36,12 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("This is a text node", TextType.ITALIC)
         self.assertEqual(node.__repr__(), "TextNode(This is a text node, italic, None)")
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_textnode_to_leafnode_text(self):
         node = TextNode("words", TextType.TEXT)
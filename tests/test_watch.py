@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import watch
+from watch import LiveReload, changed_paths, snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_snapshot_and_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            page = os.path.join(content, "blog", "post.md")
+            template = os.path.join(tmp, "template.html")
+            for path in (page, template):
+                with open(path, 'w') as file:
+                    file.write("x")
+
+            before = snapshot([content, template, os.path.join(tmp, "missing")])
+            self.assertEqual(set(before), {page, template})
+
+            with open(page, 'w') as file:
+                file.write("changed")
+            added = os.path.join(content, "new.md")
+            with open(added, 'w') as file:
+                file.write("new")
+            os.remove(template)
+
+            self.assertEqual(changed_paths(before, snapshot([content, template])), {page, added, template})
+
+    def test_files_deleted_while_listing_are_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            kept = os.path.join(tmp, "kept.md")
+            swap = os.path.join(tmp, "4913")
+            gone_dir = os.path.join(tmp, "gone")
+            os.makedirs(gone_dir)
+            for path in (kept, swap):
+                with open(path, 'w') as file:
+                    file.write("x")
+
+            # list the directory, then delete entries before they are stat'ed
+            with os.scandir(tmp) as entries:
+                listed = list(entries)
+            os.remove(swap)
+            os.rmdir(gone_dir)
+            scandir = os.scandir
+            listing = mock.MagicMock()
+            listing.__enter__.return_value = listed
+            with mock.patch.object(watch.os, "scandir", side_effect=lambda path: listing if path == tmp else scandir(path)):
+                self.assertEqual(set(snapshot([tmp])), {kept})
+
+    def test_no_changes(self):
+        state = {"a": (1, 2)}
+        self.assertEqual(changed_paths(state, dict(state)), set())
+
+class TestLiveReload(unittest.TestCase):
+    def test_current_version_without_waiting(self):
+        self.assertEqual(LiveReload().wait(-1), 0)
+
+    def test_wait_returns_after_bump(self):
+        live_reload = LiveReload()
+        threading.Timer(0.05, live_reload.bump).start()
+        self.assertEqual(live_reload.wait(0, timeout=5), 1)
+
+    def test_wait_times_out(self):
+        self.assertEqual(LiveReload().wait(0, timeout=0.01), 0)
+
+if __name__ == "__main__":
+    unittest.main()